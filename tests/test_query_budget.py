@@ -0,0 +1,46 @@
+import pytest
+
+pytest_plugins = ['pytester']
+
+pytestmark = [pytest.mark.django_db]
+
+INNER_TESTS = '''
+import pytest
+from django.db import connection
+
+
+def run_queries(count):
+    with connection.cursor() as cursor:
+        for _ in range(count):
+            cursor.execute('SELECT 1')
+
+
+@pytest.mark.query_budget(2)
+def test_within_budget():
+    run_queries(2)
+
+
+@pytest.mark.query_budget(2)
+def test_over_budget():
+    run_queries(3)
+'''
+
+
+class TestQueryBudget:
+
+    def test_marker_fails_only_over_budget(self, testdir):
+        testdir.makepyfile(INNER_TESTS)
+        result = testdir.runpytest_inprocess(
+            '-p', 'no:django', '-p', 'core.pytest_plugin',
+            '-p', 'no:cacheprovider',
+        )
+        result.assert_outcomes(passed=1, failed=1)
+        result.stdout.fnmatch_lines(['*Превышен бюджет запросов (2)*'])
+
+    def test_fixture(self, client, query_budget):
+        with pytest.raises(AssertionError, match='Превышен бюджет'):
+            with query_budget(0):
+                client.get('/')
+        # Повторный запрос гостя отдаётся из кеша страниц без SQL.
+        with query_budget(0):
+            client.get('/')
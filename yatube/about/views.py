@@ -1,9 +1,19 @@
+from django.utils.decorators import method_decorator
 from django.views.generic import TemplateView
 
+from posts.cache import cache_for_guests
 
+
+def about_tags():
+    # Страницы статичные: копия обновляется по таймауту кеша.
+    return ['about']
+
+
+@method_decorator(cache_for_guests(about_tags), name='dispatch')
 class AboutAuthorView(TemplateView):
     template_name = 'about/author.html'
 
 
+@method_decorator(cache_for_guests(about_tags), name='dispatch')
 class AboutTechView(TemplateView):
     template_name = 'about/tech.html'
@@ -0,0 +1,114 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+from posts.views import NUMBER_OF_POSTS
+
+NO_CACHE = {
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+}
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает, сколько записей в секунду отдаёт JSON API и '
+        'страница index.html. Тестовые данные создаются во временной '
+        'транзакции и откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--posts',
+            type=int,
+            default=1000,
+            help='Сколько постов создать для замера.',
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=200,
+            help='Сколько запросов сделать к каждому адресу.',
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Вывести результат в JSON.',
+        )
+
+    def seed(self, count):
+        author = User.objects.create(username='bench-api-author')
+        group = Group.objects.create(
+            title='Bench', slug='bench-api', description='Bench'
+        )
+        Post.objects.bulk_create(
+            Post(author=author, group=group, text=f'Тестовый пост {number}')
+            for number in range(count)
+        )
+
+    def measure(self, client, url, requests, items):
+        client.get(url)
+        started = time.perf_counter()
+        for _ in range(requests):
+            response = client.get(url)
+            assert response.status_code == 200, url
+        elapsed = time.perf_counter() - started
+        return {
+            'url': url,
+            'requests_per_second': round(requests / elapsed, 1),
+            'items_per_second': round(requests * items / elapsed),
+            'bytes': len(response.content),
+        }
+
+    def run(self, options):
+        self.seed(options['posts'])
+        client = Client()
+        api_url = reverse('api:post_list')
+        requests = options['requests']
+        results = {
+            'index.html': self.measure(
+                client, reverse('posts:index'), requests, NUMBER_OF_POSTS
+            ),
+            f'api ({NUMBER_OF_POSTS})': self.measure(
+                client,
+                f'{api_url}?limit={NUMBER_OF_POSTS}',
+                requests,
+                NUMBER_OF_POSTS,
+            ),
+            'api (100)': self.measure(
+                client, f'{api_url}?limit=100', requests, 100
+            ),
+        }
+        baseline = results['index.html']['items_per_second']
+        for result in results.values():
+            result['speedup'] = round(
+                result['items_per_second'] / baseline, 1
+            )
+        return results
+
+    def handle(self, *args, **options):
+        # Без кеша фрагментов, иначе index.html отдаёт готовую разметку.
+        with override_settings(CACHES=NO_CACHE):
+            try:
+                with transaction.atomic():
+                    results = self.run(options)
+                    raise Rollback
+            except Rollback:
+                pass
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:<12} {result["items_per_second"]:>8} записей/с '
+                f'{result["requests_per_second"]:>8} запросов/с '
+                f'{result["bytes"]:>8} байт  x{result["speedup"]}'
+            )
@@ -0,0 +1,119 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post, User
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(
+            username='test', first_name='Лев', last_name='Толстой'
+        )
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.posts = Post.objects.bulk_create(
+            Post(author=cls.user, group=cls.group, text=f'Пост {number}')
+            for number in range(25)
+        )
+        cls.post = Post.objects.latest('pub_date', 'id')
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.user, text=f'Комментарий {n}')
+            for n in range(3)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_post_list_cursor(self):
+        """Список постов листается курсором до конца без повторов."""
+        url = reverse('api:post_list') + '?limit=10'
+        seen = []
+        while url:
+            response = self.guest_client.get(url)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            seen += [post['id'] for post in data['results']]
+            url = data['next']
+        expected = list(Post.objects.values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_not_modified(self):
+        """ETag общий для всех пользователей и меняется с новым постом."""
+        urls = (
+            reverse('api:post_list'),
+            reverse('api:post_detail', kwargs={'post_id': self.post.id}),
+        )
+        authorized_client = Client()
+        authorized_client.force_login(self.user)
+        for url in urls:
+            with self.subTest(url=url):
+                etag = self.guest_client.get(url)['ETag']
+                for client in (self.guest_client, authorized_client):
+                    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+                    self.assertEqual(response.status_code, 304)
+        etag = self.guest_client.get(urls[0])['ETag']
+        Post.objects.create(author=self.user, text='Новый пост')
+        response = self.guest_client.get(urls[0], HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_post_detail(self):
+        """Пост отдаётся с автором и группой, неизвестный — 404."""
+        response = self.guest_client.get(
+            reverse('api:post_detail', kwargs={'post_id': self.post.id})
+        )
+        data = response.json()
+        self.assertEqual(data['id'], self.post.id)
+        self.assertEqual(data['text'], self.post.text)
+        self.assertEqual(data['author'], 'test')
+        self.assertEqual(data['group'], 'test-slug')
+        self.assertIsNone(data['image'])
+        response = self.guest_client.get(
+            reverse('api:post_detail', kwargs={'post_id': 10 ** 6})
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {'detail': 'Не найдено.'})
+
+    def test_comments_groups_authors(self):
+        """Комментарии, группы и авторы доступны через API."""
+        comments = self.guest_client.get(
+            reverse('api:comment_list', kwargs={'post_id': self.post.id})
+        ).json()['results']
+        self.assertEqual(
+            [comment['text'] for comment in comments],
+            ['Комментарий 0', 'Комментарий 1', 'Комментарий 2'],
+        )
+        groups = self.guest_client.get(reverse('api:group_list')).json()
+        self.assertEqual(groups['results'][0]['slug'], 'test-slug')
+        group = self.guest_client.get(
+            reverse('api:group_detail', kwargs={'slug': 'test-slug'})
+        ).json()
+        self.assertEqual(group['posts_count'], 25)
+        group_posts = self.guest_client.get(
+            reverse('api:group_posts', kwargs={'slug': 'test-slug'})
+        ).json()
+        self.assertEqual(len(group_posts['results']), 20)
+        author = self.guest_client.get(
+            reverse('api:author_detail', kwargs={'username': 'test'})
+        ).json()
+        self.assertEqual(
+            author,
+            {'username': 'test', 'full_name': 'Лев Толстой', 'posts_count': 25}
+        )
+        author_posts = self.guest_client.get(
+            reverse('api:author_posts', kwargs={'username': 'test'}),
+            {'limit': 5},
+        ).json()
+        self.assertEqual(len(author_posts['results']), 5)
+
+    def test_post_list_queries(self):
+        """Страница списка постов — один запрос к базе."""
+        self.guest_client.get(reverse('api:post_list'))
+        with self.assertNumQueries(1):
+            self.guest_client.get(reverse('api:post_list'))
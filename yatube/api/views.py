@@ -0,0 +1,189 @@
+"""
+Read-only JSON API v1.
+
+Записи читаются через .values(): модели не создаются, а словари
+сериализуются в JSON почти без обработки. Списки листаются курсором,
+поэтому глубокие страницы не дороже первой и обходятся без COUNT(*).
+Ответы не зависят от пользователя: условный GET проверяется по версиям
+тегов адреса до view, а служебные middleware страниц API пропускают
+(BARE_PATH_PREFIXES).
+"""
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse
+
+from posts import counters
+from posts.cache import conditional_resource
+from posts.models import Comment, Group, Post, User
+from posts.utils import CursorPaginator
+from posts.views import group_tags, index_tags, post_tags, profile_tags
+
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+POST_FIELDS = (
+    'id', 'text', 'pub_date', 'author__username', 'group__slug', 'image'
+)
+COMMENT_FIELDS = ('id', 'post_id', 'author__username', 'text', 'created')
+GROUP_FIELDS = ('id', 'title', 'slug', 'description')
+
+
+def _page_size(request):
+    try:
+        size = int(request.GET.get('limit', PAGE_SIZE))
+    except ValueError:
+        size = PAGE_SIZE
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def _links(request, *cursors):
+    """Абсолютные ссылки на страницы с курсорами; None для None."""
+    base = query = None
+    links = []
+    for cursor in cursors:
+        if cursor is None:
+            links.append(None)
+            continue
+        if base is None:
+            base = request.build_absolute_uri(request.path)
+            query = request.GET.copy()
+        query['cursor'] = cursor
+        links.append(f'{base}?{query.urlencode()}')
+    return links
+
+
+def serialize_post(row):
+    return {
+        'id': row['id'],
+        'text': row['text'],
+        'pub_date': row['pub_date'],
+        'author': row['author__username'],
+        'group': row['group__slug'],
+        'image': (
+            default_storage.url(row['image']) if row['image'] else None
+        ),
+    }
+
+
+def serialize_comment(row):
+    return {
+        'id': row['id'],
+        'post': row['post_id'],
+        'author': row['author__username'],
+        'text': row['text'],
+        'created': row['created'],
+    }
+
+
+def api_response(data, status=200):
+    return JsonResponse(
+        data,
+        encoder=DjangoJSONEncoder,
+        status=status,
+        json_dumps_params={'ensure_ascii': False},
+    )
+
+
+def not_found():
+    return api_response({'detail': 'Не найдено.'}, status=404)
+
+
+def cursor_list(request, rows, serialize, ordering=('pub_date', 'id'),
+                descending=True):
+    paginator = CursorPaginator(
+        rows, _page_size(request), ordering=ordering, descending=descending
+    )
+    page = paginator.get_page(request.GET.get('cursor'))
+    next_link, previous_link = _links(
+        request, page.next_cursor, page.previous_cursor
+    )
+    return api_response({
+        'results': [serialize(row) for row in page.object_list],
+        'next': next_link,
+        'previous': previous_link,
+    })
+
+
+# Разбор полей .values() с join автора и группы делается один раз:
+# запросы view получают копии готового QuerySet.
+POST_ROWS = Post.objects.values(*POST_FIELDS)
+
+
+@conditional_resource(index_tags)
+def post_list(request):
+    return cursor_list(request, POST_ROWS, serialize_post)
+
+
+@conditional_resource(post_tags)
+def post_detail(request, post_id):
+    row = POST_ROWS.filter(id=post_id).first()
+    if row is None:
+        return not_found()
+    return api_response(serialize_post(row))
+
+
+@conditional_resource(post_tags)
+def comment_list(request, post_id):
+    if not Post.objects.filter(id=post_id).exists():
+        return not_found()
+    comments = Comment.objects.filter(post_id=post_id).values(
+        *COMMENT_FIELDS
+    )
+    return cursor_list(
+        request,
+        comments,
+        serialize_comment,
+        ordering=('created', 'id'),
+        descending=False,
+    )
+
+
+@conditional_resource(index_tags)
+def group_list(request):
+    groups = Group.objects.order_by('title').values(*GROUP_FIELDS)
+    return api_response({'results': list(groups)})
+
+
+@conditional_resource(group_tags)
+def group_detail(request, slug):
+    group = Group.objects.filter(slug=slug).values(*GROUP_FIELDS).first()
+    if group is None:
+        return not_found()
+    group['posts_count'] = counters.group_post_count(group['id'])
+    return api_response(group)
+
+
+@conditional_resource(group_tags)
+def group_posts(request, slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'id', flat=True
+    ).first()
+    if group_id is None:
+        return not_found()
+    posts = POST_ROWS.filter(group_id=group_id)
+    return cursor_list(request, posts, serialize_post)
+
+
+@conditional_resource(profile_tags)
+def author_detail(request, username):
+    author = User.objects.filter(username=username).values(
+        'id', 'username', 'first_name', 'last_name'
+    ).first()
+    if author is None:
+        return not_found()
+    return api_response({
+        'username': author['username'],
+        'full_name': f'{author["first_name"]} {author["last_name"]}'.strip(),
+        'posts_count': counters.author_post_count(author['id']),
+    })
+
+
+@conditional_resource(profile_tags)
+def author_posts(request, username):
+    author_id = User.objects.filter(username=username).values_list(
+        'id', flat=True
+    ).first()
+    if author_id is None:
+        return not_found()
+    posts = POST_ROWS.filter(author_id=author_id)
+    return cursor_list(request, posts, serialize_post)
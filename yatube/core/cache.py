@@ -0,0 +1,315 @@
+"""
+Кеш в файле SQLite, общий для всех процессов и воркеров на машине.
+
+В отличие от LocMemCache запись из одного воркера сразу видна остальным,
+поэтому сброс версий тегов (posts.cache) доходит до всех процессов.
+Файл открыт в режиме WAL: читатели не ждут писателей. Размер кеша
+ограничен числом записей (MAX_ENTRIES) и объёмом (MAX_SIZE, байт);
+при переполнении сначала удаляются просроченные, затем давно не
+читанные записи (LRU). Целые числа хранятся как INTEGER, поэтому
+incr/decr выполняются одним атомарным UPDATE.
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'core.cache.SQLiteCache',
+            'LOCATION': '/var/tmp/yatube-cache.sqlite3',
+            'OPTIONS': {'MAX_ENTRIES': 100000, 'MAX_SIZE': 256 * 2 ** 20},
+        }
+    }
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends import locmem
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from . import metrics
+
+SCHEMA = [
+    'CREATE TABLE IF NOT EXISTS cache ('
+    'key TEXT PRIMARY KEY, value, expires REAL, '
+    'accessed REAL NOT NULL, size INTEGER NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)',
+    'CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)',
+    'CREATE TABLE IF NOT EXISTS cache_stats ('
+    'id INTEGER PRIMARY KEY CHECK (id = 0), '
+    'entries INTEGER NOT NULL, size INTEGER NOT NULL)',
+    'INSERT OR IGNORE INTO cache_stats VALUES (0, 0, 0)',
+    'CREATE TRIGGER IF NOT EXISTS cache_ai AFTER INSERT ON cache BEGIN '
+    'UPDATE cache_stats SET entries = entries + 1, size = size + new.size; '
+    'END',
+    'CREATE TRIGGER IF NOT EXISTS cache_ad AFTER DELETE ON cache BEGIN '
+    'UPDATE cache_stats SET entries = entries - 1, size = size - old.size; '
+    'END',
+    'CREATE TRIGGER IF NOT EXISTS cache_au AFTER UPDATE OF size ON cache '
+    'BEGIN UPDATE cache_stats SET size = size - old.size + new.size; END',
+]
+
+_MISSING = object()
+
+
+class LocMemCache(locmem.LocMemCache):
+    """LocMemCache, который учитывает попадания в метриках запроса."""
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        if value is _MISSING:
+            metrics.cache_lookup(0, 1)
+            return default
+        metrics.cache_lookup(1, 0)
+        return value
+
+
+# Время последнего чтения обновляется не чаще раза в секунду:
+# для LRU этого хватает, а горячие ключи не превращают чтения в записи.
+ACCESS_RESOLUTION = 1.0
+
+
+def _encode(value):
+    if type(value) is int:
+        return value, 8
+    blob = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+    return blob, len(blob)
+
+
+def _decode(value):
+    if isinstance(value, int):
+        return value
+    return pickle.loads(value)
+
+
+class SQLiteCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._path = location
+        self._max_size = int(options.get('MAX_SIZE', 64 * 2 ** 20))
+        self._busy_timeout = int(options.get('BUSY_TIMEOUT', 5000))
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None and self._local.pid == os.getpid():
+            return connection
+        directory = os.path.dirname(self._path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(
+            self._path, timeout=self._busy_timeout / 1000,
+            isolation_level=None,
+        )
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.execute(f'PRAGMA busy_timeout={self._busy_timeout}')
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            for statement in SCHEMA:
+                connection.execute(statement)
+        finally:
+            connection.execute('COMMIT')
+        self._local.connection = connection
+        self._local.pid = os.getpid()
+        return connection
+
+    def _write(self, statements):
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            result = statements(connection)
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        return result
+
+    def _store(self, connection, key, value, timeout, now, only_new=False):
+        value, size = _encode(value)
+        expires = self.get_backend_timeout(timeout)
+        if only_new:
+            connection.execute(
+                'DELETE FROM cache WHERE key = ? AND expires <= ?', (key, now)
+            )
+            cursor = connection.execute(
+                'INSERT OR IGNORE INTO cache VALUES (?, ?, ?, ?, ?)',
+                (key, value, expires, now, size),
+            )
+            return cursor.rowcount == 1
+        connection.execute(
+            'INSERT INTO cache VALUES (?, ?, ?, ?, ?) '
+            'ON CONFLICT (key) DO UPDATE SET value = excluded.value, '
+            'expires = excluded.expires, accessed = excluded.accessed, '
+            'size = excluded.size',
+            (key, value, expires, now, size),
+        )
+        return True
+
+    def _cull(self, connection, now):
+        entries, size = connection.execute(
+            'SELECT entries, size FROM cache_stats'
+        ).fetchone()
+        if entries <= self._max_entries and size <= self._max_size:
+            return
+        connection.execute('DELETE FROM cache WHERE expires <= ?', (now,))
+        while True:
+            entries, size = connection.execute(
+                'SELECT entries, size FROM cache_stats'
+            ).fetchone()
+            if entries <= self._max_entries and size <= self._max_size:
+                return
+            if self._cull_frequency == 0:
+                connection.execute('DELETE FROM cache')
+                return
+            connection.execute(
+                'DELETE FROM cache WHERE key IN ('
+                'SELECT key FROM cache ORDER BY accessed LIMIT ?)',
+                (max(entries // self._cull_frequency, 1),),
+            )
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        now = time.time()
+
+        def statements(connection):
+            added = self._store(
+                connection, key, value, timeout, now, only_new=True
+            )
+            self._cull(connection, now)
+            return added
+        return self._write(statements)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout=timeout, version=version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        now = time.time()
+        items = []
+        for key, value in data.items():
+            key = self.make_key(key, version=version)
+            self.validate_key(key)
+            items.append((key, value))
+
+        def statements(connection):
+            for key, value in items:
+                self._store(connection, key, value, timeout, now)
+            self._cull(connection, now)
+        self._write(statements)
+        return []
+
+    def get(self, key, default=None, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return self._get_many([key]).get(key, default)
+
+    def get_many(self, keys, version=None):
+        made = {self.make_key(key, version=version): key for key in keys}
+        for key in made:
+            self.validate_key(key)
+        found = self._get_many(list(made))
+        return {made[key]: value for key, value in found.items()}
+
+    def _get_many(self, keys):
+        if not keys:
+            return {}
+        now = time.time()
+        placeholders = ', '.join('?' * len(keys))
+        rows = self._connection().execute(
+            f'SELECT key, value, expires, accessed FROM cache '
+            f'WHERE key IN ({placeholders})',
+            keys,
+        ).fetchall()
+        found = {}
+        stale = []
+        expired = []
+        for key, value, expires, accessed in rows:
+            if expires is not None and expires <= now:
+                expired.append((key, now))
+                continue
+            found[key] = _decode(value)
+            if accessed < now - ACCESS_RESOLUTION:
+                stale.append((now, key))
+        metrics.cache_lookup(len(found), len(keys) - len(found))
+        if stale or expired:
+            def statements(connection):
+                connection.executemany(
+                    'UPDATE cache SET accessed = ? WHERE key = ?', stale
+                )
+                connection.executemany(
+                    'DELETE FROM cache WHERE key = ? AND expires <= ?',
+                    expired,
+                )
+            self._write(statements)
+        return found
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        now = time.time()
+
+        def statements(connection):
+            return connection.execute(
+                'UPDATE cache SET expires = ?, accessed = ? WHERE key = ? '
+                'AND (expires IS NULL OR expires > ?)',
+                (self.get_backend_timeout(timeout), now, key, now),
+            ).rowcount == 1
+        return self._write(statements)
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version=version)
+
+    def delete_many(self, keys, version=None):
+        keys = [self.make_key(key, version=version) for key in keys]
+        for key in keys:
+            self.validate_key(key)
+
+        def statements(connection):
+            connection.executemany(
+                'DELETE FROM cache WHERE key = ?', [(key,) for key in keys]
+            )
+        self._write(statements)
+
+    def has_key(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        row = self._connection().execute(
+            'SELECT 1 FROM cache WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (key, time.time()),
+        ).fetchone()
+        return row is not None
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        now = time.time()
+
+        def statements(connection):
+            row = connection.execute(
+                'SELECT value FROM cache WHERE key = ? '
+                'AND (expires IS NULL OR expires > ?)',
+                (key, now),
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"Key '{key}' not found")
+            if not isinstance(row[0], int):
+                raise TypeError(f"Key '{key}' does not hold an integer")
+            connection.execute(
+                'UPDATE cache SET value = value + ?, accessed = ? '
+                'WHERE key = ?',
+                (delta, now, key),
+            )
+            return row[0] + delta
+        return self._write(statements)
+
+    def clear(self):
+        self._write(lambda connection: connection.execute(
+            'DELETE FROM cache'
+        ))
+
+    def close(self, **kwargs):
+        # Соединение живёт всё время работы потока: Django вызывает close()
+        # после каждого запроса, а открывать файл заново дорого.
+        pass
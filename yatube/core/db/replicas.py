@@ -0,0 +1,93 @@
+"""
+Чтение лент с реплик.
+
+Запросы идут в 'default', кроме view, обёрнутых в replica_reads: на время
+такого view чтения уходят на одну из реплик settings.DATABASE_REPLICAS
+(одну на весь запрос, чтобы не смешивать реплики с разным отставанием).
+Записи всегда идут в 'default'. Сессии, пользователи и типы содержимого
+всегда читаются из 'default': request.user разрешается лениво, уже внутри
+view, и с отстающей реплики вошедший пользователь оказался бы гостем.
+
+Реплика может отставать, поэтому view, обёрнутые в pins_primary, ставят
+после удачной записи куку: следующие REPLICA_PIN_SECONDS секунд чтения
+этого пользователя идут в 'default', и он видит свои изменения. Код,
+который знает о свежей записи сам (например, по версиям тегов кеша),
+переключает запрос на 'default' через use_primary().
+"""
+import random
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+
+PIN_COOKIE = 'primary_until'
+
+PRIMARY_APPS = {'sessions', 'auth', 'contenttypes'}
+
+reading_from = ContextVar('replica_alias', default=None)
+
+
+def replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def pin_seconds():
+    return getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+
+
+def is_pinned(request):
+    try:
+        return float(request.COOKIES.get(PIN_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def use_primary():
+    """Оставшиеся чтения текущего запроса пойдут в 'default'."""
+    reading_from.set(None)
+
+
+def replica_reads(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not replicas() or is_pinned(request):
+            return view(request, *args, **kwargs)
+        token = reading_from.set(random.choice(replicas()))
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            reading_from.reset(token)
+    return wrapper
+
+
+def pins_primary(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        if (replicas() and request.method not in ('GET', 'HEAD')
+                and response.status_code < 400):
+            seconds = pin_seconds()
+            response.set_cookie(
+                PIN_COOKIE, f'{time.time() + seconds:.3f}',
+                max_age=seconds, httponly=True, samesite='Lax',
+            )
+        return response
+    return wrapper
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in PRIMARY_APPS:
+            return 'default'
+        return reading_from.get() or 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Реплики — копии основной базы, схему им приносит репликация.
+        return db not in replicas()
@@ -0,0 +1,149 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+
+from core.cache import SQLiteCache
+
+BACKENDS = {
+    'locmem': lambda directory: LocMemCache('bench', {
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    }),
+    'filebased': lambda directory: FileBasedCache(
+        os.path.join(directory, 'files'),
+        {'OPTIONS': {'MAX_ENTRIES': 100000}},
+    ),
+    'sqlite': lambda directory: SQLiteCache(
+        os.path.join(directory, 'cache.sqlite3'),
+        {'OPTIONS': {'MAX_ENTRIES': 100000}},
+    ),
+}
+
+# Значение размером с закешированный фрагмент ленты.
+PAYLOAD = 'x' * 4096
+
+
+def run_ops(backend, directory, operations, prefix=''):
+    cache = BACKENDS[backend](directory)
+    keys = [f'{prefix}key:{number}' for number in range(operations)]
+    timings = {}
+
+    started = time.perf_counter()
+    for key in keys:
+        cache.set(key, PAYLOAD)
+    timings['set'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for key in keys:
+        cache.get(key)
+    timings['get'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for start in range(0, operations, 10):
+        cache.get_many(keys[start:start + 10])
+    timings['get_many'] = time.perf_counter() - started
+
+    cache.set(f'{prefix}counter', 0)
+    started = time.perf_counter()
+    for _ in range(operations):
+        cache.incr(f'{prefix}counter')
+    timings['incr'] = time.perf_counter() - started
+    return timings
+
+
+def run_worker(args):
+    return run_ops(*args)
+
+
+def shared_between_processes(backend, directory):
+    with ProcessPoolExecutor(1) as pool:
+        # Процесс стартует до записи, иначе fork унесёт копию LocMemCache.
+        pool.submit(read_shared, backend, directory).result()
+        BACKENDS[backend](directory).set('shared', 'parent')
+        return pool.submit(read_shared, backend, directory).result()
+
+
+def read_shared(backend, directory):
+    return BACKENDS[backend](directory).get('shared') == 'parent'
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает скорость LocMemCache, FileBasedCache и SQLiteCache '
+        'на типичных операциях кеша ленты.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--operations',
+            type=int,
+            default=2000,
+            help='Сколько раз повторить каждую операцию.',
+        )
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=1,
+            help='Сколько процессов одновременно нагружают кеш.',
+        )
+        parser.add_argument(
+            '--backend',
+            action='append',
+            choices=list(BACKENDS),
+            help='Какие кеши сравнивать; по умолчанию все.',
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Вывести результат в JSON.',
+        )
+
+    def handle(self, *args, **options):
+        operations = options['operations']
+        processes = options['processes']
+        results = {}
+        for backend in options['backend'] or list(BACKENDS):
+            directory = tempfile.mkdtemp(prefix='bench-cache-')
+            try:
+                jobs = [
+                    (backend, directory, operations, f'p{number}:')
+                    for number in range(processes)
+                ]
+                if processes > 1:
+                    with ProcessPoolExecutor(processes) as pool:
+                        timings = list(pool.map(run_worker, jobs))
+                else:
+                    timings = [run_worker(jobs[0])]
+                results[backend] = {
+                    operation: round(
+                        operations * processes
+                        / max(timing[operation] for timing in timings)
+                    )
+                    for operation in timings[0]
+                }
+                results[backend]['shared'] = shared_between_processes(
+                    backend, directory
+                )
+            finally:
+                shutil.rmtree(directory, ignore_errors=True)
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        columns = ['set', 'get', 'get_many', 'incr']
+        self.stdout.write(
+            f'{"операций/с":<12}'
+            + ''.join(f'{column:>12}' for column in columns)
+            + f'{"общий":>8}'
+        )
+        for backend, result in results.items():
+            self.stdout.write(
+                f'{backend:<12}'
+                + ''.join(f'{result[column]:>12}' for column in columns)
+                + f'{"да" if result["shared"] else "нет":>8}'
+            )
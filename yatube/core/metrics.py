@@ -0,0 +1,83 @@
+"""
+Метрики текущего запроса: SQL, шаблоны, кеш и превью картинок.
+
+Сборщик лежит в contextvar, его создаёт core.middleware.ServerTimingMiddleware.
+Вне запроса (воркеры, команды) сборщика нет и учёт ничего не стоит.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.template.backends import django as django_backend
+
+current = ContextVar('request_metrics', default=None)
+
+
+class Metrics:
+    def __init__(self):
+        self.timings = {}
+        self.counts = {}
+
+    def add(self, name, seconds=0.0, count=1):
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+        self.counts[name] = self.counts.get(name, 0) + count
+
+    def sql(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.add('db', time.perf_counter() - started)
+
+    def as_dict(self):
+        return {
+            name: {
+                'ms': round(self.timings[name] * 1000, 2),
+                'count': self.counts[name],
+            }
+            for name in self.timings
+        }
+
+
+def add(name, seconds=0.0, count=1):
+    metrics = current.get()
+    if metrics is not None:
+        metrics.add(name, seconds, count)
+
+
+def cache_lookup(hits, misses):
+    metrics = current.get()
+    if metrics is not None:
+        if hits:
+            metrics.add('cache-hit', count=hits)
+        if misses:
+            metrics.add('cache-miss', count=misses)
+
+
+@contextmanager
+def timer(name):
+    metrics = current.get()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add(name, time.perf_counter() - started)
+
+
+class Template(django_backend.Template):
+    def render(self, context=None, request=None):
+        with timer('template'):
+            return super().render(context, request)
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    """Шаблонизатор Django, который учитывает время рендеринга."""
+
+    def from_string(self, template_code):
+        return Template(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return Template(super().get_template(template_name).template, self)
@@ -0,0 +1,120 @@
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from . import metrics
+from .queries import QueryDetector, detect
+
+logger = logging.getLogger('yatube.performance')
+
+# Заголовки передаются в latin-1, поэтому описания на английском.
+SERVER_TIMING_NAMES = {
+    'db': 'SQL',
+    'template': 'Templates',
+    'thumbnail': 'Thumbnails',
+}
+
+
+def bare_path_prefixes():
+    return tuple(getattr(settings, 'BARE_PATH_PREFIXES', ()))
+
+
+class ServerTimingMiddleware:
+    """
+    Отдаёт метрики запроса в заголовке Server-Timing (при DEBUG и
+    сотрудникам) и пишет их в лог для доли запросов
+    PERFORMANCE_LOG_SAMPLE_RATE и для всех запросов дольше
+    PERFORMANCE_SLOW_REQUEST_MS. SQL потоковых ответов, выполненный
+    после отдачи заголовков, не учитывается.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(
+            settings, 'PERFORMANCE_LOG_SAMPLE_RATE', 0.01
+        )
+        self.slow_ms = getattr(settings, 'PERFORMANCE_SLOW_REQUEST_MS', 500)
+        self.bare_prefixes = bare_path_prefixes()
+
+    def __call__(self, request):
+        if request.path_info.startswith(self.bare_prefixes):
+            return self.get_response(request)
+        collected = metrics.Metrics()
+        token = metrics.current.set(collected)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(collected.sql)
+                    )
+                response = self.get_response(request)
+        finally:
+            metrics.current.reset(token)
+        total = (time.perf_counter() - started) * 1000
+        if self.shows_timing(request):
+            response['Server-Timing'] = self.server_timing(collected, total)
+        if total >= self.slow_ms or random.random() < self.sample_rate:
+            self.log(request, response, collected, total)
+        return response
+
+    def shows_timing(self, request):
+        # Время SQL и шаблонов видно только при DEBUG и сотрудникам.
+        # Ответы из кеша страниц для гостей до AuthenticationMiddleware
+        # не доходят, и request.user у них нет.
+        if settings.DEBUG:
+            return True
+        user = getattr(request, 'user', None)
+        return user is not None and user.is_staff
+
+    def server_timing(self, collected, total):
+        entries = [f'total;dur={total:.1f}']
+        for name, description in SERVER_TIMING_NAMES.items():
+            if name in collected.timings:
+                entries.append(
+                    f'{name};dur={collected.timings[name] * 1000:.1f};'
+                    f'desc="{description} x{collected.counts[name]}"'
+                )
+        hits = collected.counts.get('cache-hit', 0)
+        misses = collected.counts.get('cache-miss', 0)
+        if hits or misses:
+            entries.append(f'cache;desc="hit {hits} miss {misses}"')
+        return ', '.join(entries)
+
+    def log(self, request, response, collected, total):
+        match = request.resolver_match
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': match and match.view_name,
+            'status': response.status_code,
+            'ms': round(total, 2),
+            'metrics': collected.as_dict(),
+        }, ensure_ascii=False))
+
+
+class QueryDetectorMiddleware:
+    """
+    Пишет в лог 'yatube.queries' медленные и повторяющиеся запросы
+    каждого запроса. Включается настройкой QUERY_DETECTOR = True.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_DETECTOR', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.bare_prefixes = bare_path_prefixes()
+
+    def __call__(self, request):
+        if request.path_info.startswith(self.bare_prefixes):
+            return self.get_response(request)
+        with detect(QueryDetector(request)) as detector:
+            response = self.get_response(request)
+        detector.report()
+        return response
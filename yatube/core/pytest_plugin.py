@@ -0,0 +1,57 @@
+"""
+Плагин pytest: бюджет SQL-запросов для теста.
+
+    @pytest.mark.query_budget(4)
+    def test_index(client):
+        client.get('/')
+
+    def test_profile(client, query_budget):
+        with query_budget(5):
+            client.get('/profile/test/')
+
+Тест падает, если запросов больше бюджета; в сообщении перечислены
+повторяющиеся запросы и строки шаблонов или кода, откуда они пришли.
+
+Кроме того, перед каждым тестом очищается кеш: версии тегов и копии
+страниц для гостей иначе переживают тестовую базу и достаются
+следующему тесту. Выборочный лог метрик запросов на время теста
+выключен, как и под manage.py test (core.test_runner).
+"""
+import pytest
+from django.core.cache import cache
+from django.test.utils import override_settings
+
+from core.queries import query_budget as budget_context
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        'markers',
+        'query_budget(n): тест падает, если выполнит больше n SQL-запросов',
+    )
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    marker = item.get_closest_marker('query_budget')
+    if marker is None:
+        yield
+        return
+    with budget_context(*marker.args, **marker.kwargs):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def no_metrics_sampling():
+    with override_settings(PERFORMANCE_LOG_SAMPLE_RATE=0):
+        yield
+
+
+@pytest.fixture
+def query_budget():
+    return budget_context
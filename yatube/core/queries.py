@@ -0,0 +1,138 @@
+"""
+Поиск медленных и повторяющихся SQL-запросов.
+
+QueryDetector — обёртка выполнения запросов (connection.execute_wrapper).
+Запросы сводятся к «форме»: литералы и списки IN заменяются заглушками,
+поэтому N+1 выглядит как одна форма, повторённая много раз. Для такой
+формы и для медленных запросов запоминается место вызова: строка шаблона,
+если запрос выполнил шаблон, или строка Python-кода вне Django.
+"""
+import logging
+import os
+import re
+import sys
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+import django
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('yatube.queries')
+
+FINGERPRINT_RULES = [
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(...)'),
+    (re.compile(r'\s+'), ' '),
+]
+DJANGO_DIR = os.path.dirname(django.__file__)
+
+
+def fingerprint(sql):
+    for pattern, replacement in FINGERPRINT_RULES:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def call_site():
+    """Строка шаблона или кода проекта, из которой пришёл запрос."""
+    frame = sys._getframe(1)
+    code_line = None
+    while frame is not None:
+        node = frame.f_locals.get('self')
+        if (frame.f_code.co_name == 'render_annotated'
+                and getattr(node, 'token', None) is not None):
+            origin = node.origin
+            return f'{origin.template_name}:{node.token.lineno}'
+        filename = frame.f_code.co_filename
+        if (code_line is None and not filename.startswith(DJANGO_DIR)
+                and filename != __file__):
+            code_line = f'{filename}:{frame.f_lineno}'
+        frame = frame.f_back
+    return code_line
+
+
+class QueryDetector:
+    def __init__(self, request=None, slow_ms=None, duplicates=None):
+        self.request = request
+        self.slow_ms = slow_ms if slow_ms is not None else getattr(
+            settings, 'QUERY_DETECTOR_SLOW_MS', 100
+        )
+        self.threshold = duplicates if duplicates is not None else getattr(
+            settings, 'QUERY_DETECTOR_DUPLICATES', 3
+        )
+        self.count = 0
+        self.shapes = Counter()
+        self.sites = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.record(sql, (time.perf_counter() - started) * 1000)
+
+    @property
+    def view_name(self):
+        match = self.request and self.request.resolver_match
+        return match.view_name if match else None
+
+    def record(self, sql, elapsed_ms):
+        self.count += 1
+        shape = fingerprint(sql)
+        self.shapes[shape] += 1
+        if self.shapes[shape] == self.threshold:
+            self.sites[shape] = call_site()
+        if elapsed_ms >= self.slow_ms:
+            logger.warning(
+                'Медленный запрос %.1f мс во view %s (%s): %s',
+                elapsed_ms, self.view_name, call_site(), sql,
+            )
+
+    def duplicates(self):
+        return [
+            (shape, count, self.sites.get(shape))
+            for shape, count in self.shapes.most_common()
+            if count >= self.threshold
+        ]
+
+    def report(self):
+        for shape, count, site in self.duplicates():
+            logger.warning(
+                'Повторяющийся запрос x%d во view %s (%s): %s',
+                count, self.view_name, site, shape,
+            )
+
+    def describe(self):
+        lines = [f'{self.count} запросов']
+        lines += [
+            f'  x{count} {shape}' + (f'  ({site})' if site else '')
+            for shape, count, site in self.duplicates()
+        ]
+        return '\n'.join(lines)
+
+
+@contextmanager
+def detect(detector):
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(detector))
+        yield detector
+
+
+@contextmanager
+def query_budget(budget):
+    """
+    Падает с AssertionError, если внутри блока выполнено больше budget
+    запросов; в сообщении — повторяющиеся формы запросов и их источник.
+    """
+    detector = QueryDetector(duplicates=2, slow_ms=float('inf'))
+    with detect(detector):
+        yield detector
+    if detector.count > budget:
+        raise AssertionError(
+            f'Превышен бюджет запросов ({budget}): {detector.describe()}'
+        )
@@ -0,0 +1,60 @@
+"""
+Хранилище файлов с адресацией по содержимому.
+
+Имя файла — sha256 содержимого, разложенный по подкаталогам
+(posts/ab/cd/abcd….gif), поэтому одинаковые загрузки хранятся один раз,
+а у одинаковых картинок одинаковые ключи превью sorl-thumbnail. Один файл
+может принадлежать нескольким записям: удалять его можно, только когда
+на него больше никто не ссылается (см. manage.py media_gc).
+"""
+import hashlib
+import os
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+HASH_CHUNK = 64 * 1024
+
+
+def content_hash(content):
+    digest = hashlib.sha256()
+    content.seek(0)
+    for chunk in content.chunks(HASH_CHUNK):
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+@deconstructible
+class HashedFileSystemStorage(FileSystemStorage):
+    def hashed_name(self, name, content):
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        digest = content_hash(content)
+        return os.path.join(
+            directory, digest[:2], digest[2:4], digest + extension
+        ).replace('\\', '/')
+
+    def is_hashed(self, name):
+        directory, filename = os.path.split(name)
+        digest = os.path.splitext(filename)[0]
+        return (
+            len(digest) == 64
+            and ('/' + directory.replace('\\', '/')).endswith(
+                f'/{digest[:2]}/{digest[2:4]}'
+            )
+        )
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.hashed_name(name, content)
+        if self.exists(name):
+            # Свежее время изменения защищает файл от media_gc, пока
+            # запись, которая на него сошлётся, ещё не сохранена.
+            os.utime(self.path(name))
+            return name
+        return super().save(name, content, max_length=max_length)
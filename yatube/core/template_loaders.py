@@ -0,0 +1,151 @@
+"""
+Загрузчик шаблонов с кешем скомпилированных шаблонов и встраиванием
+{% include %}.
+
+Стандартный cached.Loader Django включает только при DEBUG=False, а без
+него каждый рендеринг заново читает и разбирает index.html, base.html и
+все подключаемые шаблоны. Этот загрузчик кеширует всегда; при DEBUG он
+сверяет время изменения файлов и перекомпилирует изменённые шаблоны.
+
+{% include 'имя' %} с именем-константой при компиляции заменяется
+узлом InlinedIncludeNode с уже разобранным содержимым шаблона: в цикле
+по постам не нужно на каждой итерации искать шаблон по имени и вызывать
+его render. Контекст, with и only работают как у обычного include.
+Включения с именем из переменной и шаблоны с {% extends %} остаются
+как есть.
+
+    'loaders': [('core.template_loaders.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ])],
+"""
+import os
+import threading
+
+from django.template import Node, NodeList, TemplateDoesNotExist
+from django.template.defaulttags import IfNode
+from django.template.loader_tags import ExtendsNode, IncludeNode
+from django.template.loaders import cached
+
+
+class InlinedIncludeNode(Node):
+    """{% include %}, содержимое которого подставлено при компиляции."""
+
+    def __init__(self, include, template):
+        self.template = template
+        self.nodelist = template.nodelist
+        self.extra_context = include.extra_context
+        self.isolated_context = include.isolated_context
+        self.token = include.token
+        self.origin = include.origin
+
+    def render(self, context):
+        values = {
+            name: var.resolve(context)
+            for name, var in self.extra_context.items()
+        }
+        with context.render_context.push_state(self.template):
+            if self.isolated_context:
+                return self.nodelist.render(context.new(values))
+            with context.push(**values):
+                return self.nodelist.render(context)
+
+
+def mtime(name):
+    try:
+        return os.path.getmtime(name)
+    except (OSError, TypeError, ValueError):
+        return None
+
+
+def child_nodelists(node):
+    # У IfNode свойство nodelist собирает новый список на каждый вызов.
+    if isinstance(node, IfNode):
+        return [nodelist for _, nodelist in node.conditions_nodelists]
+    return [
+        nodelist for nodelist in (
+            getattr(node, attr, None) for attr in node.child_nodelists
+        )
+        if isinstance(nodelist, NodeList)
+    ]
+
+
+def static_name(include):
+    expression = include.template
+    if getattr(expression, 'filters', True):
+        return None
+    name = getattr(expression, 'var', None)
+    return name if isinstance(name, str) else None
+
+
+class Loader(cached.Loader):
+
+    def __init__(self, engine, loaders, check_changes=None):
+        super().__init__(engine, loaders)
+        self.check_changes = (
+            engine.debug if check_changes is None else check_changes
+        )
+        self.compiling = threading.local()
+
+    def reset(self):
+        super().reset()
+        self.compiling = threading.local()
+
+    def get_template(self, template_name, skip=None):
+        key = self.cache_key(template_name, skip)
+        if self.check_changes and self.is_stale(
+            self.get_template_cache.get(key, self)
+        ):
+            del self.get_template_cache[key]
+        template = super().get_template(template_name, skip)
+        if not hasattr(template, 'dependencies'):
+            template.dependencies = {
+                template.origin.name: mtime(template.origin.name)
+            }
+            self.inline(template)
+        return template
+
+    def is_stale(self, template):
+        if template is self:
+            return False
+        # При DEBUG не запоминаем и отсутствие шаблона: его могли создать.
+        dependencies = getattr(template, 'dependencies', None)
+        return dependencies is None or any(
+            mtime(name) != modified for name, modified in dependencies.items()
+        )
+
+    def inline(self, template):
+        stack = getattr(self.compiling, 'stack', None)
+        if stack is None:
+            stack = self.compiling.stack = []
+        stack.append(template.origin.name)
+        try:
+            self.inline_nodes(template, template.nodelist, stack)
+        finally:
+            stack.pop()
+
+    def inline_nodes(self, template, nodelist, stack):
+        for index, node in enumerate(nodelist):
+            if isinstance(node, IncludeNode):
+                included = self.included(node, stack)
+                if included is not None:
+                    nodelist[index] = InlinedIncludeNode(node, included)
+                    template.dependencies.update(included.dependencies)
+                continue
+            for child in child_nodelists(node):
+                self.inline_nodes(template, child, stack)
+
+    def included(self, include, stack):
+        name = static_name(include)
+        if name is None:
+            return None
+        try:
+            template = self.get_template(name)
+        except TemplateDoesNotExist:
+            # Ошибка появится при рендеринге, как у обычного include.
+            return None
+        if template.origin.name in stack or any(
+            isinstance(node, ExtendsNode) for node in template.nodelist
+        ):
+            return None
+        return template
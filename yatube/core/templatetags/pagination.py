@@ -0,0 +1,19 @@
+from django import template
+from django.http import QueryDict
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def page_url(context, **params):
+    """
+    Ссылка на страницу. Из запроса сохраняется только поисковая фраза
+    страницы поиска (query в контексте): пагинатор лент кешируется
+    во фрагменте, и чужие GET-параметры попали бы в ссылки для всех.
+    """
+    query = QueryDict(mutable=True)
+    if context.get('query'):
+        query['q'] = context['query']
+    for key, value in params.items():
+        query[key] = value
+    return f'?{query.urlencode()}'
@@ -0,0 +1,19 @@
+"""
+Раннер manage.py test: на время тестов выключает выборочный лог метрик
+запросов, чтобы вывод не зависел от случая. Тесты самого лога задают
+PERFORMANCE_LOG_SAMPLE_RATE через override_settings.
+"""
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class Runner(DiscoverRunner):
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.no_sampling = override_settings(PERFORMANCE_LOG_SAMPLE_RATE=0)
+        self.no_sampling.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.no_sampling.disable()
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,98 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from ..cache import SQLiteCache
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def make_cache(self, **options):
+        return SQLiteCache(
+            os.path.join(self.directory, 'cache.sqlite3'),
+            {'OPTIONS': options},
+        )
+
+    def test_set_get_delete(self):
+        """Значения сохраняются, читаются и удаляются."""
+        cache = self.make_cache()
+        cache.set('post', {'text': 'Тестовый пост'})
+        cache.set_many({'one': 1, 'two': b'2'})
+        self.assertEqual(cache.get('post'), {'text': 'Тестовый пост'})
+        self.assertEqual(
+            cache.get_many(['one', 'two', 'missing']), {'one': 1, 'two': b'2'}
+        )
+        self.assertFalse(cache.add('one', 10))
+        self.assertTrue(cache.add('three', 3))
+        cache.delete('post')
+        self.assertIsNone(cache.get('post'))
+        cache.clear()
+        self.assertEqual(cache.get_many(['one', 'two', 'three']), {})
+
+    def test_expiry(self):
+        """Просроченная запись не возвращается, и её можно добавить снова."""
+        cache = self.make_cache()
+        cache.set('key', 'value', timeout=0)
+        self.assertIsNone(cache.get('key'))
+        self.assertFalse(cache.has_key('key'))
+        self.assertTrue(cache.add('key', 'new'))
+        self.assertTrue(cache.touch('key', timeout=None))
+        self.assertEqual(cache.get('key'), 'new')
+
+    def test_shared_between_instances(self):
+        """Два экземпляра на одном файле видят записи друг друга."""
+        self.make_cache().set('version', 42)
+        self.assertEqual(self.make_cache().get('version'), 42)
+
+    def test_incr_is_atomic(self):
+        """Параллельные incr из разных потоков не теряют приращений."""
+        cache = self.make_cache()
+        cache.set('counter', 0)
+
+        def work():
+            for _ in range(50):
+                cache.incr('counter')
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(cache.get('counter'), 200)
+        self.assertEqual(cache.decr('counter', 10), 190)
+        with self.assertRaises(ValueError):
+            cache.incr('missing')
+
+    def test_lru_eviction(self):
+        """При переполнении вытесняются давно не читанные записи."""
+        cache = self.make_cache(MAX_ENTRIES=4, CULL_FREQUENCY=2)
+        for number in range(4):
+            cache.set(f'key:{number}', number)
+        connection = cache._connection()
+        connection.execute(
+            'UPDATE cache SET accessed = ? WHERE key LIKE ?',
+            (time.time() - 60, '%key:%'),
+        )
+        cache.get('key:0')
+        cache.set('key:4', 4)
+        self.assertEqual(
+            set(cache.get_many([f'key:{number}' for number in range(5)])),
+            {'key:0', 'key:3', 'key:4'},
+        )
+
+    def test_max_size(self):
+        """Объём кеша не превышает MAX_SIZE."""
+        cache = self.make_cache(MAX_SIZE=10000)
+        for number in range(10):
+            cache.set(f'key:{number}', 'x' * 2000)
+        size, = cache._connection().execute(
+            'SELECT size FROM cache_stats'
+        ).fetchone()
+        self.assertLessEqual(size, 10000)
+        self.assertIsNotNone(cache.get('key:9'))
@@ -0,0 +1,52 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.db import connection
+from django.test import SimpleTestCase
+
+from ..db.sqlite3.base import DatabaseWrapper
+
+
+class TunedSQLiteTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.wrapper = DatabaseWrapper({
+            **connection.settings_dict,
+            'NAME': os.path.join(self.directory, 'db.sqlite3'),
+            'CONN_MAX_AGE': None,
+            'OPTIONS': {
+                'pragmas': {'mmap_size': 2 ** 20},
+                'transaction_mode': 'immediate',
+            },
+        }, alias='tuned')
+
+    def tearDown(self):
+        self.wrapper.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def pragma(self, name):
+        with self.wrapper.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_are_set_on_connect(self):
+        """Каждое новое соединение получает PRAGMA из настроек."""
+        self.assertEqual(self.pragma('journal_mode'), 'wal')
+        self.assertEqual(self.pragma('synchronous'), 1)
+        self.assertEqual(self.pragma('mmap_size'), 2 ** 20)
+        self.assertEqual(self.pragma('busy_timeout'), 5000)
+        self.assertEqual(self.wrapper.transaction_mode, 'IMMEDIATE')
+
+    def test_broken_connection_is_replaced(self):
+        """Переиспользуемое соединение проверяется перед новым запросом."""
+        self.pragma('journal_mode')
+        first = self.wrapper.connection
+        self.wrapper.close_if_unusable_or_obsolete()
+        self.pragma('journal_mode')
+        self.assertIs(self.wrapper.connection, first)
+        first.close()
+        self.wrapper.close_if_unusable_or_obsolete()
+        self.assertEqual(self.pragma('journal_mode'), 'wal')
+        self.assertIsNot(self.wrapper.connection, first)
@@ -0,0 +1,68 @@
+import json
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+
+
+class ServerTimingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='test')
+        cls.staff = User.objects.create(username='staff', is_staff=True)
+        Post.objects.create(author=cls.user, text='Тестовый пост')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.staff_client = Client()
+        self.staff_client.force_login(ServerTimingTests.staff)
+
+    def timing(self, response):
+        entries = {}
+        for entry in response['Server-Timing'].split(', '):
+            name, *params = entry.split(';')
+            entries[name] = dict(param.split('=', 1) for param in params)
+        return entries
+
+    def test_server_timing_header(self):
+        """Заголовок Server-Timing содержит SQL, шаблоны и кеш."""
+        response = self.staff_client.get(reverse('posts:index'))
+        timing = self.timing(response)
+        self.assertIn('total', timing)
+        self.assertIn('db', timing)
+        self.assertIn('template', timing)
+        self.assertNotIn('miss 0', timing['cache']['desc'])
+        response = self.staff_client.get(reverse('posts:index'))
+        self.assertIn('miss 0', self.timing(response)['cache']['desc'])
+
+    def test_server_timing_is_hidden(self):
+        """Гости и пользователи получают Server-Timing только при DEBUG."""
+        user_client = Client()
+        user_client.force_login(ServerTimingTests.user)
+        for client in (self.guest_client, user_client):
+            response = client.get(reverse('posts:index'))
+            self.assertFalse(response.has_header('Server-Timing'))
+            with self.settings(DEBUG=True):
+                response = client.get(reverse('posts:index'))
+            self.assertTrue(response.has_header('Server-Timing'))
+
+    @override_settings(PERFORMANCE_LOG_SAMPLE_RATE=1)
+    def test_sampled_log(self):
+        """Выбранные запросы пишутся в лог одной JSON-строкой."""
+        with self.assertLogs('yatube.performance', 'INFO') as logs:
+            Client().get(reverse('posts:index'))
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'posts:index')
+        self.assertEqual(record['status'], 200)
+        self.assertGreater(record['metrics']['db']['count'], 0)
+
+    def test_bare_paths(self):
+        """Адреса API проходят мимо метрик и кеша страниц для гостей."""
+        response = self.staff_client.get(reverse('api:post_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('Server-Timing'))
+        self.assertTrue(response.has_header('ETag'))
@@ -0,0 +1,48 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+
+from ..queries import fingerprint, query_budget
+
+
+class QueryDetectorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        for number in range(3):
+            user = User.objects.create(username=f'user{number}')
+            Post.objects.create(author=user, text='Тестовый пост')
+
+    def test_fingerprint(self):
+        """Запросы, отличающиеся только значениями, имеют одну форму."""
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE id = 1 AND name = 'a''b'"),
+            fingerprint('SELECT * FROM t WHERE id = %s AND name = %s'),
+        )
+        self.assertEqual(
+            fingerprint('SELECT * FROM t WHERE id IN (%s, %s,  %s)'),
+            'SELECT * FROM t WHERE id IN (...)',
+        )
+
+    def test_query_budget_reports_duplicates(self):
+        """Превышение бюджета показывает повторяющийся запрос и его место."""
+        with self.assertRaises(AssertionError) as error:
+            with query_budget(2):
+                for post in Post.objects.all():
+                    post.author.username
+        message = str(error.exception)
+        self.assertIn('4 запросов', message)
+        self.assertIn('x3 SELECT', message)
+        self.assertIn('test_queries.py', message)
+        with query_budget(1):
+            list(Post.objects.select_related('author'))
+
+    @override_settings(QUERY_DETECTOR=True, QUERY_DETECTOR_SLOW_MS=0)
+    def test_middleware_logs_slow_queries(self):
+        """Медленный запрос попадает в лог вместе с именем view."""
+        cache.clear()
+        with self.assertLogs('yatube.queries', 'WARNING') as logs:
+            Client().get(reverse('posts:index'))
+        self.assertIn('posts:index', logs.output[0])
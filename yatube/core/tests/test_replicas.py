@@ -0,0 +1,105 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, connections
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import counters
+from posts.models import Counter, Post, User
+
+from ..db.replicas import PIN_COOKIE, reading_from
+
+REPLICA_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(TestCase):
+    """
+    Реплика — отдельный файл SQLite со схемой основной базы, но без
+    данных тестов: что прочитано с реплики, видно по пустой ленте.
+    """
+    databases = {'default', 'replica'}
+
+    @classmethod
+    def setUpClass(cls):
+        connection.ensure_connection()
+        path = os.path.join(REPLICA_DIR, 'replica.sqlite3')
+        with sqlite3.connect(path) as replica:
+            connection.connection.backup(replica)
+        connections.databases['replica'] = {
+            **connection.settings_dict, 'NAME': path
+        }
+        super().setUpClass()
+        cls.user = User.objects.create(username='author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica'].close()
+        del connections.databases['replica']
+        del connections._connections.replica
+        shutil.rmtree(REPLICA_DIR, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.author_client = Client()
+        self.author_client.force_login(ReplicaRoutingTests.user)
+
+    def test_reads_go_to_replica_and_writes_pin_primary(self):
+        """Ленты читаются с реплики, автор после записи — с основной."""
+        response = self.author_client.post(
+            reverse('posts:post_create'), {'text': 'свежий пост'}
+        )
+        self.assertIn(PIN_COOKIE, response.cookies)
+        self.assertTrue(Post.objects.using('default').exists())
+        self.assertFalse(Post.objects.using('replica').exists())
+        self.assertContains(
+            self.author_client.get(reverse('posts:index')), 'свежий пост'
+        )
+        # Теги ленты только что обновлены: гость тоже читает основную базу.
+        index = reverse('posts:index')
+        self.assertContains(Client().get(index), 'свежий пост')
+        with self.settings(REPLICA_PIN_SECONDS=0):
+            cache.clear()
+            self.assertNotContains(Client().get(index), 'свежий пост')
+
+    def test_session_and_user_are_read_from_primary(self):
+        """Сессия и пользователь читаются из основной базы, не с реплики."""
+        with self.settings(REPLICA_PIN_SECONDS=0), \
+                CaptureQueriesContext(connections['replica']) as replica, \
+                CaptureQueriesContext(connection) as primary:
+            response = self.author_client.get(reverse('posts:index'))
+        self.assertContains(response, 'Пользователь: author')
+        self.assertTrue(any(
+            'django_session' in query['sql'] for query in primary
+        ))
+        self.assertFalse(any(
+            'django_session' in query['sql']
+            or query['sql'].startswith('SELECT "auth_user"')
+            for query in replica
+        ))
+        # Лента пуста, и с реплики читается только счётчик постов.
+        self.assertTrue(any(
+            query['sql'].startswith('SELECT "posts_') for query in replica
+        ))
+
+    def test_counter_is_initialized_on_primary(self):
+        """Счётчика нет и на реплике: он заводится по основной базе."""
+        Post.objects.create(author=self.user, text='первый')
+        Post.objects.create(author=self.user, text='второй')
+        name = counters.author_key(self.user.pk)
+        Counter.objects.filter(name=name).delete()
+        token = reading_from.set('replica')
+        try:
+            self.assertEqual(counters.author_post_count(self.user.pk), 2)
+        finally:
+            reading_from.reset(token)
+        self.assertEqual(
+            Counter.objects.using('default').get(name=name).value, 2
+        )
@@ -0,0 +1,33 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.test import SimpleTestCase
+
+from ..storage import HashedFileSystemStorage
+
+
+class HashedStorageTests(SimpleTestCase):
+    def setUp(self):
+        self.location = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.storage = HashedFileSystemStorage(location=self.location)
+
+    def tearDown(self):
+        shutil.rmtree(self.location, ignore_errors=True)
+
+    def test_identical_uploads_share_one_file(self):
+        """Одинаковое содержимое сохраняется один раз под хешем."""
+        first = self.storage.save('posts/a.GIF', ContentFile(b'gif'))
+        second = self.storage.save('posts/b.gif', ContentFile(b'gif'))
+        other = self.storage.save('posts/a.gif', ContentFile(b'png'))
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertRegex(
+            first, r'^posts/([0-9a-f]{2})/([0-9a-f]{2})/\1\2[0-9a-f]{60}\.gif$'
+        )
+        self.assertTrue(self.storage.is_hashed(first))
+        self.assertFalse(self.storage.is_hashed('posts/a.gif'))
+        self.assertEqual(self.storage.listdir(first.rsplit('/', 1)[0])[1], [
+            first.rsplit('/', 1)[1]
+        ])
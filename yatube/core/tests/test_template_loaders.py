@@ -0,0 +1,81 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.template import Context, Engine
+from django.test import SimpleTestCase
+
+from ..template_loaders import InlinedIncludeNode
+
+TEMPLATES = {
+    'list.html': (
+        '{% for item in items %}'
+        '{% include "item.html" %}'
+        '{% include "item.html" with label="*" item=item only %}'
+        '{% include name %}'
+        '{% endfor %}{{ image_url|default:"-" }}'
+    ),
+    'item.html': (
+        '{% if item %}[{{ label|default:"#" }}{{ item }}'
+        '{% include "image.html" %}]{% endif %}'
+    ),
+    'image.html': (
+        '{% with image_url=item|upper %}{{ image_url }}{% endwith %}'
+    ),
+    'other.html': '({{ forloop.counter }})',
+}
+
+
+class InliningLoaderTests(SimpleTestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        for name, source in TEMPLATES.items():
+            self.write(name, source)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def write(self, name, source, mtime=None):
+        path = os.path.join(self.dir, name)
+        with open(path, 'w', encoding='utf-8') as stream:
+            stream.write(source)
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+
+    def engine(self, loaders=None):
+        return Engine(dirs=[self.dir], loaders=loaders, debug=True)
+
+    def render(self, engine):
+        return engine.get_template('list.html').render(
+            Context({'items': ['a', 'b'], 'name': 'other.html'})
+        )
+
+    def test_inlined_includes_render_like_include(self):
+        """Встроенные include дают тот же результат, что и обычные."""
+        engine = self.engine([('core.template_loaders.Loader', [
+            'django.template.loaders.filesystem.Loader',
+        ])])
+        self.assertEqual(self.render(engine), self.render(self.engine()))
+        self.assertEqual(
+            self.render(engine), '[#aA][*aA](1)[#bB][*bB](2)-'
+        )
+        loop = engine.get_template('list.html').nodelist[0].nodelist_loop
+        self.assertEqual(
+            [type(node).__name__ for node in loop],
+            ['InlinedIncludeNode', 'InlinedIncludeNode', 'IncludeNode'],
+        )
+        self.assertIsInstance(
+            loop[0].nodelist[0].conditions_nodelists[0][1][3],
+            InlinedIncludeNode,
+        )
+
+    def test_changed_includes_are_recompiled(self):
+        """При DEBUG правка встроенного шаблона видна без перезапуска."""
+        engine = self.engine([('core.template_loaders.Loader', [
+            'django.template.loaders.filesystem.Loader',
+        ])])
+        template = engine.get_template('list.html')
+        self.assertIs(engine.get_template('list.html'), template)
+        self.write('image.html', '!', mtime=0)
+        self.assertEqual(self.render(engine), '[#a!][*a!](1)[#b!][*b!](2)-')
@@ -0,0 +1,296 @@
+"""
+Нагрузочный замер страниц yatube.
+
+Данные создаются в отдельной файловой базе (как тестовая база Django),
+запросы идут через тестовый клиент из нескольких потоков. Для каждого
+сценария считаются задержки p50/p99, число SQL-запросов и размер ответа.
+"""
+import itertools
+import os
+import random
+import re
+import statistics
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from faker import Faker
+from mixer.backend.django import mixer
+
+from .counters import recount_comments
+from .models import Comment, Group, Post, User
+
+SEED_BATCH = 5000
+TEXT_POOL = 1000
+
+# Время рендеринга шаблонов из заголовка Server-Timing
+# (core.middleware.ServerTimingMiddleware).
+TEMPLATE_TIMING = re.compile(r'(?:^|, )template;dur=([\d.]+)')
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, round(q / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, cwd=settings.BASE_DIR,
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+@contextmanager
+def bench_database(path, keepdb=False):
+    """Переключает базу default на отдельный файл на время замера."""
+    setup_test_environment()
+    settings.DATABASES['default'].setdefault('TEST', {})['NAME'] = path
+    old_name = connection.creation.create_test_db(
+        verbosity=0, autoclobber=True, keepdb=keepdb
+    )
+    try:
+        yield
+    finally:
+        connections.close_all()
+        connection.creation.destroy_test_db(old_name, 0, keepdb)
+        teardown_test_environment()
+
+
+def seed(posts, authors=100, groups=10, comments_per_post=0.1, log=None):
+    """Дополняет базу до нужного числа постов (с keepdb данные копятся)."""
+    fake = Faker('ru_RU')
+    have_authors = User.objects.count()
+    if have_authors < authors:
+        mixer.cycle(authors - have_authors).blend(
+            User, username=mixer.sequence('bench{0}')
+        )
+    have_groups = Group.objects.count()
+    if have_groups < groups:
+        mixer.cycle(groups - have_groups).blend(
+            Group, slug=mixer.sequence('bench-{0}')
+        )
+    author_ids = list(User.objects.values_list('id', flat=True))
+    group_ids = list(Group.objects.values_list('id', flat=True)) + [None]
+    texts = [fake.text(max_nb_chars=400) for _ in range(TEXT_POOL)]
+    missing = posts - Post.objects.count()
+    created = 0
+    while created < missing:
+        size = min(SEED_BATCH, missing - created)
+        Post.objects.bulk_create(
+            Post(
+                author_id=random.choice(author_ids),
+                group_id=random.choice(group_ids),
+                text=random.choice(texts),
+            )
+            for _ in range(size)
+        )
+        created += size
+        if log:
+            log(f'Постов: {posts - missing + created}')
+    missing = int(posts * comments_per_post) - Comment.objects.count()
+    if missing > 0:
+        post_ids = Post.objects.order_by('-id').values_list('id', flat=True)
+        # Комментарии достаются свежим постам, как в жизни.
+        hot = list(post_ids[:max(1, missing // 20)])
+        for start in range(0, missing, SEED_BATCH):
+            Comment.objects.bulk_create(
+                Comment(
+                    post_id=random.choice(hot),
+                    author_id=random.choice(author_ids),
+                    text=random.choice(texts)[:200],
+                )
+                for _ in range(min(SEED_BATCH, missing - start))
+            )
+        recount_comments(Post.objects.filter(id__in=hot))
+
+
+class QueryCounter:
+    """Считает SQL-запросы текущего потока, как CaptureQueriesContext."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def scenarios():
+    """Сценарии: имя -> функция (клиент, rng) -> ответ."""
+    usernames = list(User.objects.values_list('username', flat=True))
+    slugs = list(Group.objects.values_list('slug', flat=True))
+    newest = Post.objects.order_by('-id').values_list('id', flat=True)
+    post_ids = list(newest[:1000])
+
+    def index(client, rng):
+        return client.get(reverse('posts:index'))
+
+    def group_posts(client, rng):
+        return client.get(
+            reverse('posts:group_list', kwargs={'slug': rng.choice(slugs)})
+        )
+
+    def profile(client, rng):
+        return client.get(reverse(
+            'posts:profile', kwargs={'username': rng.choice(usernames)}
+        ))
+
+    def post_detail(client, rng):
+        return client.get(reverse(
+            'posts:post_detail', kwargs={'post_id': rng.choice(post_ids)}
+        ))
+
+    def post_create(client, rng):
+        return client.post(
+            reverse('posts:post_create'), {'text': 'Пост из замера'}
+        )
+
+    def add_comment(client, rng):
+        return client.post(
+            reverse(
+                'posts:add_comment',
+                kwargs={'post_id': rng.choice(post_ids)},
+            ),
+            {'text': 'Комментарий из замера'},
+        )
+
+    return {
+        'index': index,
+        'group_posts': group_posts,
+        'profile': profile,
+        'post_detail': post_detail,
+        'post_create': post_create,
+        'add_comment': add_comment,
+    }
+
+
+WRITE_SCENARIOS = ('post_create', 'add_comment')
+
+
+def summarize(samples, wall):
+    latencies = [sample[0] * 1000 for sample in samples]
+    return {
+        'requests': len(samples),
+        'requests_per_second': round(len(samples) / wall, 1),
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'queries': round(
+            statistics.mean(sample[1] for sample in samples), 2
+        ),
+        'bytes': round(statistics.mean(sample[2] for sample in samples)),
+        'errors': sum(sample[3] >= 400 for sample in samples),
+        'template_p50_ms': round(
+            percentile([sample[4] for sample in samples], 50), 2
+        ),
+    }
+
+
+def template_ms(response):
+    match = TEMPLATE_TIMING.search(response.get('Server-Timing', ''))
+    return float(match.group(1)) if match else 0.0
+
+
+def drive(jobs, requests, user, guest):
+    """
+    Запускает по потоку на каждый сценарий из jobs, пока общее число
+    запросов не достигнет requests. Возвращает сэмплы по сценариям и
+    общее время.
+    """
+    samples = {}
+    lock = threading.Lock()
+    counter = itertools.count()
+
+    def worker(job):
+        seed, (name, scenario) = job
+        rng = random.Random(seed)
+        client = Client()
+        if not guest:
+            client.force_login(user)
+        queries = QueryCounter()
+        with connection.execute_wrapper(queries):
+            while next(counter) < requests:
+                queries.count = 0
+                started = time.perf_counter()
+                try:
+                    response = scenario(client, rng)
+                except Exception:
+                    # Например, «database is locked» под нагрузкой записи.
+                    status, size, rendering = 500, 0, 0.0
+                else:
+                    status = response.status_code
+                    size = len(getattr(response, 'content', b''))
+                    rendering = template_ms(response)
+                elapsed = time.perf_counter() - started
+                with lock:
+                    samples.setdefault(name, []).append(
+                        (elapsed, queries.count, size, status, rendering)
+                    )
+        connection.close()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(len(jobs)) as pool:
+        list(pool.map(worker, enumerate(jobs)))
+    return samples, time.perf_counter() - started
+
+
+def run(names, requests, concurrency, guest=False):
+    """
+    Гоняет сценарии по очереди, каждый — в concurrency потоков.
+    С guest=True клиенты не входят на сайт, как большая часть читателей.
+    """
+    available = scenarios()
+    user = User.objects.order_by('id').first()
+    results = {}
+    for name in names:
+        samples, wall = drive(
+            [(name, available[name])] * concurrency, requests, user, guest
+        )
+        results[name] = summarize(samples[name], wall)
+    return results
+
+
+def run_mixed(names, requests, readers, writers, guest=False):
+    """
+    Чтение и запись одновременно: readers потоков ходят по сценариям
+    чтения из names, writers потоков — по сценариям записи.
+    """
+    available = scenarios()
+    user = User.objects.order_by('id').first()
+    reads = [name for name in names if name not in WRITE_SCENARIOS]
+    writes = [name for name in names if name in WRITE_SCENARIOS]
+    jobs = [
+        (name, available[name])
+        for group, count in ((reads, readers), (writes, writers))
+        for name in itertools.islice(itertools.cycle(group), count)
+    ]
+    samples, wall = drive(jobs, requests, user, guest)
+    return {
+        kind: summarize(
+            [sample for name in group for sample in samples.get(name, [])],
+            wall,
+        )
+        for kind, group in (('reads', reads), ('writes', writes))
+    }
+
+
+def metadata(posts, concurrency):
+    return {
+        'commit': git_commit(),
+        'posts': posts,
+        'concurrency': concurrency,
+        'cache': settings.CACHES['default']['BACKEND'],
+        'database': settings.DATABASES['default']['ENGINE'],
+        'cpus': os.cpu_count(),
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
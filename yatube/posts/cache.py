@@ -0,0 +1,338 @@
+"""
+Версионированные ключи кеша.
+
+Каждая лента зависит от набора тегов ('posts', 'group:<id>',
+'author:<id>', 'post:<id>', 'comments:<id>'). Запись поста или
+комментария обновляет версии своих тегов, поэтому старые фрагменты просто
+перестают находиться по ключу. Версия — момент записи в наносекундах,
+так что она же служит временем последнего изменения для условных
+GET-запросов.
+
+Теги страницы складываются из тегов, известных по адресу (tags_func
+view), и тегов, найденных при рендеринге (add_page_tags: посты и группы
+карточек). Последние запоминаются по адресу страницы (путь плюс
+page/cursor) на время жизни копии страницы, чтобы следующий запрос мог
+проверить их до выполнения view, а ключ фрагмента ленты строился без
+чтения постов.
+"""
+import hashlib
+import threading
+import time
+from datetime import datetime, timezone
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import translation
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import condition
+
+from core.db import replicas
+
+VERSION_KEY = 'tag-version:{}'
+PAGE_TAGS_KEY = 'page-tags:{}'
+GUEST_PAGE_KEY = 'guest-page:{}'
+
+_clock = threading.Lock()
+_last_version = 0
+
+
+def _new_version():
+    global _last_version
+    with _clock:
+        _last_version = max(time.time_ns(), _last_version + 1)
+        return _last_version
+
+
+def post_tags(author_id, group_id, post_id=None):
+    tags = ['posts', f'author:{author_id}']
+    if group_id is not None:
+        tags.append(f'group:{group_id}')
+    if post_id is not None:
+        tags.append(f'post:{post_id}')
+    return tags
+
+
+def comment_tags(post_id):
+    return [f'post:{post_id}', f'comments:{post_id}']
+
+
+def card_tags(posts):
+    """Теги карточек: пост и группа, название которой показано."""
+    tags = set()
+    for post in posts:
+        tags.add(f'post:{post.pk}')
+        if post.group_id is not None:
+            tags.add(f'group:{post.group_id}')
+    return sorted(tags)
+
+
+def _fetch_versions(tags):
+    """Версии тегов и множество тегов, версии которых созданы сейчас."""
+    keys = {VERSION_KEY.format(tag): tag for tag in tags}
+    found = cache.get_many(keys)
+    missing = {key: _new_version() for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, None)
+        found.update(missing)
+    versions = {keys[key]: version for key, version in found.items()}
+    return versions, {keys[key] for key in missing}
+
+
+def get_versions(tags):
+    return _fetch_versions(tags)[0]
+
+
+def bump(*tags):
+    version = _new_version()
+    cache.set_many({VERSION_KEY.format(tag): version for tag in tags}, None)
+
+
+def modified_at(versions):
+    return datetime.fromtimestamp(
+        max(versions.values()) / 1e9, tz=timezone.utc
+    )
+
+
+def feed_cache_key(request, *tags):
+    """Ключ фрагмента ленты: версии тегов плюс номер страницы/курсор."""
+    versions = get_versions(tags)
+    parts = [f'{tag}.{versions[tag]}' for tag in sorted(versions)]
+    parts.append(request.GET.get('page', ''))
+    parts.append(request.GET.get('cursor', ''))
+    return ':'.join(parts)
+
+
+def _maybe_lagging(versions):
+    """Данные с реплики могут не включать записи, отмеченные версиями."""
+    if not versions or replicas.reading_from.get() is None:
+        return False
+    window = replicas.pin_seconds() * 10 ** 9
+    return max(versions.values()) > time.time_ns() - window
+
+
+def _url_hash(request):
+    return hashlib.md5(request.get_full_path().encode()).hexdigest()
+
+
+def _page_hash(request):
+    # Посторонние параметры запроса не меняют теги страницы и не должны
+    # плодить записи в кеше.
+    parts = [request.path]
+    parts += [request.GET.get(name, '') for name in ('page', 'cursor')]
+    return hashlib.md5('|'.join(parts).encode()).hexdigest()
+
+
+def page_tags_timeout():
+    return getattr(settings, 'GUEST_PAGE_CACHE_TIMEOUT', 600)
+
+
+def page_versions(request, tags_func, *args, **kwargs):
+    """
+    Версии тегов страницы, известных до выполнения view: из tags_func и
+    запомненных прошлым рендерингом. None — объекта нет или теги
+    рендеринга для этого адреса ещё не известны.
+    """
+    if not hasattr(request, '_page'):
+        started = time.time_ns()
+        tags = tags_func(*args, **kwargs)
+        request._page = {'started': started, 'tags': tags, 'rendered': set()}
+        if tags is None:
+            request._page['versions'] = None
+            return None
+        tags_key = PAGE_TAGS_KEY.format(_page_hash(request))
+        rendered = cache.get(tags_key)
+        request._page.update(tags_key=tags_key, recorded=rendered)
+        request._page['versions'] = get_versions(
+            [*tags, *(rendered or ())]
+        )
+        if request._page['versions'] and _maybe_lagging(
+            request._page['versions']
+        ):
+            # Реплика может ещё не знать о недавней записи.
+            replicas.use_primary()
+    page = request._page
+    return page['versions'] if page.get('recorded') is not None else None
+
+
+def add_page_tags(request, *tags):
+    """
+    Добавляет теги, найденные при сборке страницы, и возвращает их.
+    Вызывается сразу после чтения данных: если версия нового тега
+    обновилась уже после начала запроса, страница могла собраться из
+    старых данных и не кешируется.
+    """
+    page = getattr(request, '_page', None)
+    if page is None or page['versions'] is None:
+        return list(tags)
+    if page.pop('assumed', False):
+        page['rendered'] = set()
+    new = set(tags) - page['rendered'] - set(page['versions'])
+    fresh, created = _fetch_versions(new)
+    if any(
+        version > page['started']
+        for tag, version in fresh.items() if tag not in created
+    ) or _maybe_lagging(fresh):
+        page['changed'] = True
+    page['versions'].update(fresh)
+    page['rendered'].update(tags)
+    return list(tags)
+
+
+def recorded_page_tags(request):
+    """
+    Теги рендеринга, запомненные для адреса, или None, если их нет.
+    Пока сборка страницы не вызовет add_page_tags, они считаются тегами
+    страницы: так при попадании в кеш фрагмента данные не читаются,
+    а при промахе настоящие теги заменят запомненные.
+    """
+    page = getattr(request, '_page', None)
+    if page is None or page['versions'] is None or page['recorded'] is None:
+        return None
+    page['rendered'].update(page['recorded'])
+    page['assumed'] = True
+    return list(page['recorded'])
+
+
+def complete_versions(request):
+    """
+    Версии всех тегов отрендеренной страницы или None, если страница
+    могла собраться из старых данных. Заодно запоминает теги рендеринга
+    для адреса.
+    """
+    page = getattr(request, '_page', None)
+    if page is None or page['versions'] is None:
+        return None
+    if 'complete' not in page:
+        rendered = page['rendered']
+        # Пустой набор тоже запоминается: без записи у адреса нет
+        # версий до рендеринга и условный GET не получит 304.
+        if page['recorded'] is None or set(page['recorded']) != rendered:
+            cache.set(
+                page['tags_key'], sorted(rendered), page_tags_timeout()
+            )
+        page['complete'] = None if page.get('changed') else {
+            tag: page['versions'][tag]
+            for tag in {*page['tags'], *rendered}
+        }
+    return page['complete']
+
+
+def page_etag(request, versions):
+    parts = [str(request.user.pk or 0)]
+    parts += [str(versions[tag]) for tag in sorted(versions)]
+    return '-'.join(parts)
+
+
+def is_guest_request(request):
+    """GET без сессионной куки: пользователь заведомо аноним."""
+    return (
+        request.method in ('GET', 'HEAD')
+        and settings.SESSION_COOKIE_NAME not in request.COOKIES
+    )
+
+
+def guest_page_key(request):
+    """Ключ копии страницы: адрес с запросом и язык."""
+    return GUEST_PAGE_KEY.format(
+        f'{translation.get_language()}:{_url_hash(request)}'
+    )
+
+
+def cache_for_guests(tags_func):
+    """
+    Разрешает posts.middleware.GuestPageCacheMiddleware сохранить ответ
+    view для всех гостей. Копия хранится с версиями всех тегов страницы
+    и перестаёт отдаваться, как только любой из них обновится.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            page_versions(request, tags_func, *args, **kwargs)
+            response = view(request, *args, **kwargs)
+            versions = complete_versions(request)
+            if versions:
+                response.guest_page_versions = versions
+            return response
+        return wrapper
+    return decorator
+
+
+def conditional_page(tags_func):
+    """
+    Отвечает 304 до выполнения view, если теги страницы не менялись.
+
+    tags_func получает аргументы view и возвращает список тегов страницы
+    или None, если объекта нет (тогда view отработает и вернёт 404).
+    Пока теги рендеринга адреса не известны, ETag ставится после
+    рендеринга. ETag учитывает пользователя; Last-Modified отдаётся только
+    гостям, потому что по одной дате нельзя отличить страницы разных людей.
+    """
+    def etag(request, *args, **kwargs):
+        versions = page_versions(request, tags_func, *args, **kwargs)
+        return versions and page_etag(request, versions)
+
+    def last_modified(request, *args, **kwargs):
+        versions = page_versions(request, tags_func, *args, **kwargs)
+        if not versions or request.user.is_authenticated:
+            return None
+        return modified_at(versions)
+
+    def decorator(view):
+        conditional_view = condition(
+            etag_func=etag, last_modified_func=last_modified
+        )(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            versions = complete_versions(request)
+            if (versions and response.status_code == 200
+                    and request.method in ('GET', 'HEAD')
+                    and not response.has_header('ETag')):
+                response['ETag'] = quote_etag(page_etag(request, versions))
+                last_modified = None
+                if not request.user.is_authenticated:
+                    last_modified = modified_at(versions).timestamp()
+                    response['Last-Modified'] = http_date(last_modified)
+                # Теги адреса стали известны только сейчас: проверяем
+                # условия запроса по готовому ETag.
+                response = get_conditional_response(
+                    request,
+                    etag=response['ETag'],
+                    last_modified=last_modified and int(last_modified),
+                    response=response,
+                )
+            return response
+        return wrapper
+    return decorator
+
+
+def conditional_resource(tags_func):
+    """
+    Условный GET для ответов, которые одинаковы для всех пользователей и
+    зависят только от тегов адреса (JSON API). Версии читаются одним
+    запросом к кешу до view; теги рендеринга не запоминаются, а ETag и
+    Last-Modified не учитывают пользователя.
+    """
+    def resource_versions(request, *args, **kwargs):
+        if not hasattr(request, '_resource_versions'):
+            tags = tags_func(*args, **kwargs)
+            versions = get_versions(tags) if tags else None
+            if versions and _maybe_lagging(versions):
+                replicas.use_primary()
+            request._resource_versions = versions
+        return request._resource_versions
+
+    def etag(request, *args, **kwargs):
+        versions = resource_versions(request, *args, **kwargs)
+        return versions and '-'.join(
+            str(versions[tag]) for tag in sorted(versions)
+        )
+
+    def last_modified(request, *args, **kwargs):
+        versions = resource_versions(request, *args, **kwargs)
+        return versions and modified_at(versions)
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
@@ -0,0 +1,146 @@
+"""
+Денормализованные счётчики постов: всего, по авторам и по группам,
+а также число комментариев и время последнего из них в самом посте.
+
+Значения приблизительные: их держат в актуальном состоянии сигналы
+моделей Post и Comment, а отсутствующий счётчик пересчитывается при
+первом чтении. Комментарии, созданные в обход сигналов (bulk_create),
+учитывает команда recount_comments.
+"""
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Comment, Counter, Post
+
+POST_COUNT_CACHE_KEY = 'posts:count'
+POST_COUNT_CACHE_TIMEOUT = 60
+
+
+def total_key():
+    return 'posts'
+
+
+def author_key(author_id):
+    return f'posts:author:{author_id}'
+
+
+def group_key(group_id):
+    return f'posts:group:{group_id}'
+
+
+def get(name, queryset):
+    try:
+        return Counter.objects.values_list('value', flat=True).get(name=name)
+    except Counter.DoesNotExist:
+        # Чтение могло уйти на отстающую реплику: счётчик заводится по
+        # основной базе, иначе в нём останется устаревшее значение.
+        primary = Counter.objects.using('default')
+        try:
+            return primary.values_list('value', flat=True).get(name=name)
+        except Counter.DoesNotExist:
+            pass
+        value = queryset.using('default').count()
+        try:
+            with transaction.atomic():
+                primary.create(name=name, value=value)
+        except IntegrityError:
+            pass
+        return value
+
+
+def change(name, delta):
+    Counter.objects.filter(name=name).update(value=F('value') + delta)
+
+
+def post_count():
+    value = cache.get(POST_COUNT_CACHE_KEY)
+    if value is None:
+        value = get(total_key(), Post.objects.all())
+        cache.set(POST_COUNT_CACHE_KEY, value, POST_COUNT_CACHE_TIMEOUT)
+    return value
+
+
+def author_post_count(author_id):
+    return get(author_key(author_id), Post.objects.filter(author=author_id))
+
+
+def group_post_count(group_id):
+    return get(group_key(group_id), Post.objects.filter(group=group_id))
+
+
+def _keys(post):
+    keys = [author_key(post.author_id)]
+    if post.group_id is not None:
+        keys.append(group_key(post.group_id))
+    return keys
+
+
+def add_posts(posts, delta=1):
+    deltas = {}
+    for post in posts:
+        for name in _keys(post):
+            deltas[name] = deltas.get(name, 0) + delta
+    deltas[total_key()] = delta * len(posts)
+    for name, value in deltas.items():
+        change(name, value)
+    cache.delete(POST_COUNT_CACHE_KEY)
+
+
+def remove_posts(posts):
+    add_posts(posts, delta=-1)
+
+
+def move_post(post, author_id, group_id):
+    """Переносит пост между счётчиками после смены автора или группы."""
+    if author_id != post.author_id:
+        change(author_key(author_id), -1)
+        change(author_key(post.author_id), 1)
+    if group_id != post.group_id:
+        if group_id is not None:
+            change(group_key(group_id), -1)
+        if post.group_id is not None:
+            change(group_key(post.group_id), 1)
+
+
+def _latest_comment():
+    return Subquery(
+        Comment.objects.filter(post=OuterRef('pk')).order_by(
+            '-created', '-id'
+        ).values('created')[:1]
+    )
+
+
+def add_comment(comment):
+    Post.objects.filter(pk=comment.post_id).update(
+        comment_count=F('comment_count') + 1,
+        last_comment_at=comment.created,
+    )
+
+
+def remove_comment(comment):
+    Post.objects.filter(pk=comment.post_id).update(
+        comment_count=Greatest(F('comment_count') - 1, 0),
+        last_comment_at=_latest_comment(),
+    )
+
+
+def recount_comments(posts):
+    """Пересчитывает comment_count и last_comment_at одним UPDATE."""
+    comments = Comment.objects.filter(post=OuterRef('pk')).order_by()
+    return posts.update(
+        comment_count=Coalesce(
+            Subquery(
+                comments.values('post').annotate(
+                    total=Count('id')
+                ).values('total')
+            ),
+            0,
+        ),
+        last_comment_at=Subquery(
+            comments.values('post').annotate(
+                last=Max('created')
+            ).values('last')
+        ),
+    )
@@ -0,0 +1,41 @@
+"""
+Форматы выгрузки постов для import_posts и export_posts.
+
+Строка — один пост: автор и группа записаны username и slug, поэтому
+файл можно загрузить в другую базу. Файлы читаются и пишутся построчно.
+"""
+import csv
+import json
+
+FIELDS = ('text', 'pub_date', 'author', 'group', 'image')
+FORMATS = ('jsonl', 'csv')
+
+
+def guess_format(path):
+    return 'csv' if path.lower().endswith('.csv') else 'jsonl'
+
+
+def read_rows(stream, file_format):
+    if file_format == 'csv':
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def write_rows(stream, file_format, rows):
+    """Пишет строки (кортежи в порядке FIELDS), возвращает их число."""
+    written = 0
+    if file_format == 'csv':
+        writer = csv.writer(stream)
+        writer.writerow(FIELDS)
+        for row in rows:
+            writer.writerow(row)
+            written += 1
+        return written
+    for row in rows:
+        stream.write(json.dumps(dict(zip(FIELDS, row)), ensure_ascii=False))
+        stream.write('\n')
+        written += 1
+    return written
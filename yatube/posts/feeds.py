@@ -0,0 +1,200 @@
+"""
+Потоковые RSS, Atom и JSON Feed для ленты, группы и профиля.
+
+Записи читаются из базы через .iterator() и сразу отдаются клиенту
+через StreamingHttpResponse, поэтому память не растёт с числом записей.
+"""
+import json
+from xml.sax.saxutils import escape
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.feedgenerator import rfc2822_date, rfc3339_date
+from django.utils.http import http_date, quote_etag
+from django.utils.text import Truncator
+
+from .cache import get_versions
+from .models import Group, Post, User
+
+FEED_ITEMS = 50
+FEED_MAX_ITEMS = 10000
+CHUNK_SIZE = 500
+
+CONTENT_TYPES = {
+    'rss': 'application/rss+xml; charset=utf-8',
+    'atom': 'application/atom+xml; charset=utf-8',
+    'json': 'application/feed+json; charset=utf-8',
+}
+
+
+def _limit(request):
+    try:
+        limit = int(request.GET.get('limit', FEED_ITEMS))
+    except ValueError:
+        limit = FEED_ITEMS
+    return max(1, min(limit, FEED_MAX_ITEMS))
+
+
+def _items(request, queryset, limit):
+    posts = queryset.select_related('author', 'group').order_by(
+        '-pub_date', '-id'
+    )[:limit]
+    for post in posts.iterator(chunk_size=CHUNK_SIZE):
+        yield post, request.build_absolute_uri(
+            reverse('posts:post_detail', kwargs={'post_id': post.id})
+        )
+
+
+def _title(post):
+    return Truncator(post.text).chars(50)
+
+
+def _author(post):
+    return post.author.get_full_name() or post.author.username
+
+
+def rss(request, title, link, queryset, limit):
+    yield (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<rss version="2.0"><channel>'
+        f'<title>{escape(title)}</title><link>{escape(link)}</link>'
+        f'<description>{escape(title)}</description>'
+    )
+    for post, url in _items(request, queryset, limit):
+        category = ''
+        if post.group is not None:
+            category = f'<category>{escape(post.group.title)}</category>'
+        yield (
+            f'<item><title>{escape(_title(post))}</title>'
+            f'<link>{escape(url)}</link>'
+            f'<guid>{escape(url)}</guid>'
+            f'<description>{escape(post.text)}</description>'
+            f'<author>{escape(_author(post))}</author>'
+            f'<pubDate>{rfc2822_date(post.pub_date)}</pubDate>'
+            f'{category}</item>'
+        )
+    yield '</channel></rss>\n'
+
+
+def atom(request, title, link, queryset, limit):
+    yield (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<feed xmlns="http://www.w3.org/2005/Atom">'
+        f'<title>{escape(title)}</title>'
+        f'<link href="{escape(link)}" rel="alternate"/>'
+        f'<id>{escape(link)}</id>'
+    )
+    for post, url in _items(request, queryset, limit):
+        category = ''
+        if post.group is not None:
+            category = f'<category term="{escape(post.group.slug)}"/>'
+        yield (
+            f'<entry><title>{escape(_title(post))}</title>'
+            f'<link href="{escape(url)}" rel="alternate"/>'
+            f'<id>{escape(url)}</id>'
+            f'<updated>{rfc3339_date(post.pub_date)}</updated>'
+            f'<author><name>{escape(_author(post))}</name></author>'
+            f'<content type="text">{escape(post.text)}</content>'
+            f'{category}</entry>'
+        )
+    yield '</feed>\n'
+
+
+def json_feed(request, title, link, queryset, limit):
+    header = json.dumps({
+        'version': 'https://jsonfeed.org/version/1.1',
+        'title': title,
+        'home_page_url': link,
+        'feed_url': request.build_absolute_uri(),
+    }, ensure_ascii=False)
+    yield header[:-1] + ', "items": ['
+    separator = ''
+    for post, url in _items(request, queryset, limit):
+        item = {
+            'id': url,
+            'url': url,
+            'title': _title(post),
+            'content_text': post.text,
+            'date_published': post.pub_date,
+            'authors': [{'name': _author(post)}],
+        }
+        if post.group is not None:
+            item['tags'] = [post.group.title]
+        yield separator + json.dumps(
+            item, cls=DjangoJSONEncoder, ensure_ascii=False
+        )
+        separator = ', '
+    yield ']}\n'
+
+
+GENERATORS = {
+    'rss': rss,
+    'atom': atom,
+    'json': json_feed,
+}
+
+
+def feed_response(request, feed_format, title, link, queryset, tag):
+    if feed_format not in GENERATORS:
+        raise Http404('Неизвестный формат ленты.')
+    limit = _limit(request)
+    newest = queryset.order_by('-pub_date').values_list(
+        'pub_date', flat=True
+    ).first()
+    last_modified = newest and int(newest.timestamp())
+    etag = quote_etag(
+        f'{feed_format}-{limit}-{get_versions([tag])[tag]}'
+    )
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is None:
+        response = StreamingHttpResponse(
+            GENERATORS[feed_format](
+                request, title, request.build_absolute_uri(link),
+                queryset, limit
+            ),
+            content_type=CONTENT_TYPES[feed_format],
+        )
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def index_feed(request, feed_format):
+    return feed_response(
+        request,
+        feed_format,
+        'Последние обновления на сайте',
+        reverse('posts:index'),
+        Post.objects.all(),
+        'posts',
+    )
+
+
+def group_feed(request, slug, feed_format):
+    group = get_object_or_404(Group, slug=slug)
+    return feed_response(
+        request,
+        feed_format,
+        f'Записи сообщества {group.title}',
+        reverse('posts:group_list', kwargs={'slug': group.slug}),
+        group.posts.all(),
+        f'group:{group.pk}',
+    )
+
+
+def profile_feed(request, username, feed_format):
+    author = get_object_or_404(User, username=username)
+    return feed_response(
+        request,
+        feed_format,
+        f'Все посты пользователя {author.get_full_name() or username}',
+        reverse('posts:profile', kwargs={'username': username}),
+        author.posts.all(),
+        f'author:{author.pk}',
+    )
@@ -1,6 +1,8 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
 
 from .models import Post, Comment
+from .uploads import file_too_large, validate_image
 
 
 class PostForm(forms.ModelForm):
@@ -17,6 +19,41 @@ class PostForm(forms.ModelForm):
         }
 
 
+class PostImageForm(forms.Form):
+    """
+    Картинка поста. Проверяются только размер файла и заголовок картинки,
+    пережимает её фоновый воркер (см. posts.uploads).
+    """
+    image = forms.FileField(
+        label='Картинка',
+        required=False,
+        help_text='JPEG, PNG, GIF или WebP',
+        widget=forms.ClearableFileInput(attrs={'accept': 'image/*'}),
+    )
+
+    def __init__(self, *args, upload_exceeds_limit=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.upload_exceeds_limit = upload_exceeds_limit
+
+    def clean_image(self):
+        # Загрузку оборвал LimitedTemporaryFileUploadHandler, и файла
+        # в запросе нет.
+        if self.upload_exceeds_limit:
+            raise file_too_large()
+        image = self.cleaned_data['image']
+        if isinstance(image, UploadedFile):
+            validate_image(image)
+        return image
+
+    def apply(self, post):
+        """Переносит картинку в пост; True, если пост получил новый файл."""
+        if 'image' not in self.changed_data:
+            return False
+        image = self.cleaned_data['image']
+        post.image = image or ''
+        return bool(image)
+
+
 class CommentForm(forms.ModelForm):
     class Meta:
         model = Comment
@@ -0,0 +1,142 @@
+import json
+import os
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from posts import benchmark
+
+NO_CACHE = {
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет отдельную базу постами и замеряет задержки, число '
+        'запросов и размер страниц ленты под параллельной нагрузкой.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--posts',
+            type=int,
+            nargs='+',
+            default=[10000],
+            help='Размеры базы для замера, например: 10000 100000 1000000.',
+        )
+        parser.add_argument(
+            '--views',
+            nargs='+',
+            default=[
+                'index', 'group_posts', 'profile', 'post_detail',
+                'post_create', 'add_comment',
+            ],
+            help='Какие сценарии запускать.',
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=200,
+            help='Сколько запросов на каждый сценарий.',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=4,
+            help='Сколько потоков шлют запросы одновременно.',
+        )
+        parser.add_argument(
+            '--database',
+            default=os.path.join(tempfile.gettempdir(), 'yatube-bench.db'),
+            help='Файл базы для замера.',
+        )
+        parser.add_argument(
+            '--keepdb',
+            action='store_true',
+            help='Не удалять базу после замера и дополнять её в следующий '
+                 'раз: миллион постов не придётся создавать заново.',
+        )
+        parser.add_argument(
+            '--no-cache',
+            action='store_true',
+            help='Замерить без кеша (DummyCache).',
+        )
+        parser.add_argument(
+            '--writers',
+            type=int,
+            default=0,
+            help='Запустить чтение и запись одновременно: --concurrency '
+                 'потоков читают, столько потоков пишут (post_create, '
+                 'add_comment). Сравнить движки: YATUBE_DB=plain/tuned.',
+        )
+        parser.add_argument(
+            '--guest',
+            action='store_true',
+            help='Ходить по страницам гостем, без входа на сайт.',
+        )
+        parser.add_argument(
+            '--output',
+            help='Сохранить результат в JSON-файл для сравнения коммитов.',
+        )
+
+    def handle(self, *args, **options):
+        if options['writers'] and not (
+            set(options['views']) - set(benchmark.WRITE_SCENARIOS)
+            and set(options['views']) & set(benchmark.WRITE_SCENARIOS)
+        ):
+            raise CommandError(
+                'Для --writers нужны и сценарии чтения, и сценарии записи.'
+            )
+        if options['no_cache']:
+            with override_settings(CACHES=NO_CACHE):
+                report = self.bench(options)
+        else:
+            report = self.bench(options)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as stream:
+                json.dump(report, stream, indent=2, ensure_ascii=False)
+        for size, results in report['results'].items():
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{size} постов'))
+            self.stdout.write(
+                f'{"":<12}{"rps":>8}{"p50, мс":>10}{"p99, мс":>10}'
+                f'{"запросов":>10}{"байт":>9}{"ошибок":>8}'
+                f'{"шаблоны, мс":>13}'
+            )
+            for name, result in results.items():
+                self.stdout.write(
+                    f'{name:<12}{result["requests_per_second"]:>8}'
+                    f'{result["p50_ms"]:>10}{result["p99_ms"]:>10}'
+                    f'{result["queries"]:>10}{result["bytes"]:>9}'
+                    f'{result["errors"]:>8}'
+                    f'{result["template_p50_ms"]:>13}'
+                )
+
+    def bench(self, options):
+        report = {
+            'meta': benchmark.metadata(
+                options['posts'], options['concurrency']
+            ),
+            'results': {},
+        }
+        report['meta']['guest'] = options['guest']
+        report['meta']['writers'] = options['writers']
+        with benchmark.bench_database(options['database'], options['keepdb']):
+            for size in sorted(options['posts']):
+                benchmark.seed(
+                    size, log=self.stdout.write if options['verbosity'] > 1
+                    else None
+                )
+                if options['writers']:
+                    report['results'][size] = benchmark.run_mixed(
+                        options['views'], options['requests'],
+                        options['concurrency'], options['writers'],
+                        guest=options['guest'],
+                    )
+                else:
+                    report['results'][size] = benchmark.run(
+                        options['views'], options['requests'],
+                        options['concurrency'], guest=options['guest'],
+                    )
+        return report
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Comment, Group, Post, User
+from posts.views import NUMBER_OF_POSTS
+
+
+class Command(BaseCommand):
+    help = 'Печатает план выполнения (EXPLAIN) для запросов лент.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--analyze',
+            action='store_true',
+            help='Выполнить запросы и показать фактический план '
+                 '(поддерживается не всеми СУБД).',
+        )
+
+    def feed_querysets(self):
+        feeds = [('index', Post.objects.select_related('group', 'author'))]
+        group = Group.objects.first()
+        if group is not None:
+            feeds.append((
+                f'group_posts ({group.slug})',
+                group.posts.select_related('author', 'group'),
+            ))
+        author = User.objects.filter(posts__isnull=False).first()
+        if author is not None:
+            feeds.append((
+                f'profile ({author.username})',
+                author.posts.select_related('author', 'group'),
+            ))
+        post = Post.objects.only('id').first()
+        if post is not None:
+            feeds.append((
+                f'post_detail comments ({post.id})',
+                Comment.objects.filter(post=post).select_related(
+                    'author'
+                ).order_by('created'),
+            ))
+        return feeds
+
+    def handle(self, *args, **options):
+        explain_options = {'analyze': True} if options['analyze'] else {}
+        for name, queryset in self.feed_querysets():
+            page = queryset[:NUMBER_OF_POSTS]
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(str(page.query))
+            self.stdout.write(page.explain(**explain_options))
+            self.stdout.write('')
@@ -0,0 +1,55 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.exchange import FORMATS, guess_format, write_rows
+from posts.models import Post
+
+
+def export_rows(chunk_size):
+    posts = Post.objects.order_by('id').values_list(
+        'text', 'pub_date', 'author__username', 'group__slug', 'image'
+    )
+    for text, pub_date, author, group, image in posts.iterator(
+        chunk_size=chunk_size
+    ):
+        yield text, pub_date.isoformat(), author, group, image
+
+
+class Command(BaseCommand):
+    help = 'Выгружает посты в JSON Lines или CSV, читая базу порциями.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Файл для выгрузки; «-» — стандартный вывод.'
+        )
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            help='Формат файла; по умолчанию — по расширению.',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Сколько строк читать из базы за раз.',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or guess_format(path)
+        started = time.monotonic()
+        rows = export_rows(options['chunk_size'])
+        if path == '-':
+            written = write_rows(sys.stdout, file_format, rows)
+        else:
+            with open(path, 'w', encoding='utf-8', newline='') as stream:
+                written = write_rows(stream, file_format, rows)
+        elapsed = time.monotonic() - started
+        # При выгрузке в stdout статистика не должна попасть в данные.
+        out = self.stderr if path == '-' else self.stdout
+        out.write(
+            f'Выгружено постов: {written} за {elapsed:.1f} с '
+            f'({written / max(elapsed, 1e-9):.0f} в секунду)'
+        )
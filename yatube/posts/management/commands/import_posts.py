@@ -0,0 +1,127 @@
+import itertools
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts.exchange import FORMATS, guess_format, read_rows
+from posts.models import Group, Post, PostQuerySet, User
+
+
+class ImportQuerySet(PostQuerySet):
+    """
+    Вставка без pre_save, как у loaddata: auto_now_add не подменяет
+    pub_date из файла, и даты не нужно возвращать вторым UPDATE.
+    """
+
+    def _insert(self, objs, fields, **kwargs):
+        kwargs['raw'] = True
+        return super()._insert(objs, fields, **kwargs)
+
+
+def parse_pub_date(value):
+    moment = value and parse_datetime(value)
+    if not moment:
+        return timezone.now()
+    if timezone.is_naive(moment):
+        return timezone.make_aware(moment)
+    return moment
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает посты из JSON Lines или CSV пачками через bulk_create. '
+        'Авторы и группы ищутся по username и slug.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Файл с постами; «-» — стандартный ввод.'
+        )
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            help='Формат файла; по умолчанию — по расширению.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Сколько постов вставлять одним запросом.',
+        )
+        parser.add_argument(
+            '--create-missing',
+            action='store_true',
+            help='Создавать неизвестных авторов и группы, '
+                 'а не пропускать их посты.',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or guess_format(path)
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть больше нуля.')
+        self.create_missing = options['create_missing']
+        self.authors = dict(User.objects.values_list('username', 'id'))
+        self.groups = dict(Group.objects.values_list('slug', 'id'))
+        self.skipped = 0
+        started = time.monotonic()
+        if path == '-':
+            imported = self.load(sys.stdin, file_format, options)
+        else:
+            with open(path, encoding='utf-8', newline='') as stream:
+                imported = self.load(stream, file_format, options)
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'Загружено постов: {imported}, пропущено: {self.skipped} '
+            f'за {elapsed:.1f} с ({imported / max(elapsed, 1e-9):.0f} '
+            'в секунду)'
+        )
+
+    def load(self, stream, file_format, options):
+        posts = filter(None, map(self.build, read_rows(stream, file_format)))
+        imported = 0
+        while True:
+            batch = list(itertools.islice(posts, options['batch_size']))
+            if not batch:
+                return imported
+            ImportQuerySet(Post).bulk_create(batch)
+            imported += len(batch)
+            if options['verbosity'] > 1:
+                self.stdout.write(f'… {imported}')
+
+    def build(self, row):
+        author_id = self.resolve(
+            self.authors, row.get('author'),
+            lambda username: User.objects.create(username=username),
+        )
+        if author_id is None or not row.get('text'):
+            self.skipped += 1
+            return None
+        group_id = None
+        if row.get('group'):
+            group_id = self.resolve(
+                self.groups, row['group'],
+                lambda slug: Group.objects.create(
+                    title=slug, slug=slug, description=''
+                ),
+            )
+            if group_id is None:
+                self.skipped += 1
+                return None
+        return Post(
+            text=row['text'],
+            pub_date=parse_pub_date(row.get('pub_date')),
+            author_id=author_id,
+            group_id=group_id,
+            image=row.get('image') or '',
+        )
+
+    def resolve(self, known, name, create):
+        if not name:
+            return None
+        if name not in known and self.create_missing:
+            known[name] = create(name).pk
+        return known.get(name)
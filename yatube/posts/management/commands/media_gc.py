@@ -0,0 +1,95 @@
+import posixpath
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.cache import bump, post_tags
+from posts.models import Post
+
+BATCH = 500
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет картинки постов, на которые не ссылается ни один пост. '
+        'С --rehash сначала переносит старые файлы в хранилище '
+        'с адресацией по содержимому.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace',
+            type=float,
+            default=1.0,
+            help='Не трогать файлы моложе стольких часов.',
+        )
+        parser.add_argument(
+            '--rehash',
+            action='store_true',
+            help='Перенести файлы со старыми именами под хеш содержимого.',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать, что будет удалено.',
+        )
+
+    def handle(self, *args, **options):
+        field = Post._meta.get_field('image')
+        self.storage = field.storage
+        self.dry_run = options['dry_run']
+        if options['rehash']:
+            self.rehash()
+        deadline = time.time() - options['grace'] * 3600
+        referenced = set(
+            Post.objects.exclude(image='').values_list(
+                'image', flat=True
+            ).iterator()
+        )
+        removed = freed = 0
+        for name in self.walk(field.upload_to.rstrip('/')):
+            if name in referenced:
+                continue
+            if self.storage.get_modified_time(name).timestamp() > deadline:
+                continue
+            removed += 1
+            freed += self.storage.size(name)
+            if self.dry_run:
+                self.stdout.write(name)
+            else:
+                self.storage.delete(name)
+        self.stdout.write(
+            f'Удалено файлов: {removed}, освобождено {freed / 2 ** 20:.1f} МБ'
+            + (' (пробный запуск)' if self.dry_run else '')
+        )
+
+    def walk(self, directory):
+        if not self.storage.exists(directory):
+            return
+        directories, files = self.storage.listdir(directory)
+        for name in files:
+            yield posixpath.join(directory, name)
+        for name in directories:
+            yield from self.walk(posixpath.join(directory, name))
+
+    def rehash(self):
+        posts = Post.objects.exclude(image='').values_list(
+            'id', 'image', 'author_id', 'group_id'
+        )
+        moved = 0
+        for post_id, name, author_id, group_id in posts.iterator(
+            chunk_size=BATCH
+        ):
+            if self.storage.is_hashed(name) or not self.storage.exists(name):
+                continue
+            moved += 1
+            if self.dry_run:
+                continue
+            with self.storage.open(name) as content:
+                new_name = self.storage.save(name, content)
+            # Старый файл остаётся сиротой и удаляется ниже по --grace.
+            if Post.objects.filter(pk=post_id, image=name).update(
+                image=new_name
+            ):
+                bump(*post_tags(author_id, group_id, post_id))
+        self.stdout.write(f'Перенесено под хеш: {moved}')
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+
+from posts.counters import recount_comments
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает число комментариев и время последнего комментария '
+        'у постов, диапазонами id.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='Сколько id постов пересчитывать одним UPDATE.',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        last_id = Post.objects.aggregate(last=Max('id'))['last'] or 0
+        updated = 0
+        for start in range(0, last_id + 1, options['batch_size']):
+            updated += recount_comments(Post.objects.filter(
+                id__gte=start, id__lt=start + options['batch_size']
+            ))
+        self.stdout.write(
+            f'Пересчитано постов: {updated} за '
+            f'{time.monotonic() - started:.1f} с'
+        )
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.thumbnails import process_pending
+
+
+class Command(BaseCommand):
+    help = 'Генерирует превью картинок постов из очереди.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Обработать очередь один раз и выйти.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=2.0,
+            help='Пауза между опросами пустой очереди, в секундах.',
+        )
+        parser.add_argument(
+            '--batch',
+            type=int,
+            default=50,
+            help='Сколько задач брать из очереди за один проход.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            processed = process_pending(limit=options['batch'])
+            if processed:
+                self.stdout.write(f'Готово превью: {processed}')
+            elif options['once']:
+                return
+            else:
+                time.sleep(options['interval'])
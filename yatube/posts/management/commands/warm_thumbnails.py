@@ -0,0 +1,63 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts.models import Rendition
+from posts.thumbnails import enqueue_missing, generate, pending
+
+
+def setup_worker():
+    django.setup()
+    connections.close_all()
+
+
+def render_chunk(ids):
+    renditions = Rendition.objects.filter(id__in=ids).select_related('post')
+    return sum(generate(rendition) for rendition in renditions)
+
+
+def chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class Command(BaseCommand):
+    help = (
+        'Заранее готовит превью для уже загруженных картинок постов '
+        'в несколько процессов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count(),
+            help='Число процессов; 0 — работать в текущем процессе.',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=20,
+            help='Сколько превью отдавать процессу за раз.',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        enqueue_missing()
+        ids = list(pending().values_list('id', flat=True))
+        parts = chunks(ids, options['chunk_size'])
+        if options['workers']:
+            connections.close_all()
+            with ProcessPoolExecutor(
+                options['workers'], initializer=setup_worker
+            ) as pool:
+                done = sum(pool.map(render_chunk, parts))
+        else:
+            done = sum(map(render_chunk, parts))
+        self.stdout.write(
+            f'Готово превью: {done} за {time.monotonic() - started:.1f} с'
+        )
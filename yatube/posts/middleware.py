@@ -0,0 +1,75 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+from core.middleware import bare_path_prefixes
+
+from .cache import get_versions, guest_page_key, is_guest_request
+
+# Эти заголовки добавляют внешние middleware на каждый ответ заново.
+SKIP_HEADERS = {'server-timing'}
+
+
+class GuestPageCacheMiddleware:
+    """
+    Общий для всех гостей кеш страниц, помеченных cache_for_guests.
+
+    Стоит до SessionMiddleware и AuthenticationMiddleware: запрос без
+    сессионной куки при попадании в кеш не трогает ни сессию, ни
+    пользователя, ни базу. Копия хранится вместе с версиями тегов,
+    снятыми перед рендерингом, и отдаётся, только пока они не изменились.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.timeout = getattr(settings, 'GUEST_PAGE_CACHE_TIMEOUT', 600)
+        self.bare_prefixes = bare_path_prefixes()
+
+    def __call__(self, request):
+        if (not is_guest_request(request)
+                or request.path_info.startswith(self.bare_prefixes)):
+            return self.get_response(request)
+        key = guest_page_key(request)
+        entry = cache.get(key)
+        if entry is not None:
+            versions, status, headers, content = entry
+            if get_versions(versions) == versions:
+                return self.rebuild(request, status, headers, content)
+        response = self.get_response(request)
+        if self.can_store(request, response):
+            headers = [
+                (name, value) for name, value in response.items()
+                if name.lower() not in SKIP_HEADERS
+            ]
+            cache.set(
+                key,
+                (response.guest_page_versions, response.status_code,
+                 headers, response.content),
+                self.timeout,
+            )
+        return response
+
+    def can_store(self, request, response):
+        return (
+            hasattr(response, 'guest_page_versions')
+            and response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+            and not request.META.get('CSRF_COOKIE_USED')
+            and 'private' not in response.get('Cache-Control', '')
+        )
+
+    def rebuild(self, request, status, headers, content):
+        response = HttpResponse(content, status=status)
+        for name, value in headers:
+            response[name] = value
+        return get_conditional_response(
+            request,
+            etag=response.get('ETag'),
+            last_modified=parse_http_date_safe(
+                response.get('Last-Modified', '')
+            ),
+            response=response,
+        )
@@ -0,0 +1,30 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Rendition',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=32, verbose_name='Вариант')),
+                ('url', models.CharField(blank=True, max_length=255, verbose_name='Адрес')),
+                ('failed', models.BooleanField(default=False, verbose_name='Ошибка генерации')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Поставлено в очередь')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='renditions', to='posts.Post', verbose_name='Пост')),
+            ],
+            options={
+                'verbose_name': 'Превью картинки',
+                'verbose_name_plural': 'Превью картинок',
+                'unique_together': {('post', 'name')},
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 2.2.16 on 2026-10-18 06:26
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_image_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rendition',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Попытки'),
+        ),
+        migrations.AddField(
+            model_name='rendition',
+            name='available_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Доступно воркеру с'),
+        ),
+    ]
@@ -1,8 +1,35 @@
-from django.db import models
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import models, router
 from django.contrib.auth import get_user_model
+from django.utils import timezone
+from django.dispatch import Signal
+
+from core.storage import HashedFileSystemStorage
 
 User = get_user_model()
 
+image_storage = HashedFileSystemStorage()
+
+posts_bulk_created = Signal(providing_args=['objs'])
+
+# Поля, которые меняют только UPDATE из posts.counters.
+COUNTER_FIELDS = ('comment_count', 'last_comment_at')
+
+# pk постов, удаляемых текущим вызовом delete(): их комментарии уходят
+# каскадом, и счётчики самих постов обновлять незачем.
+deleting_posts = ContextVar('deleting_posts', default=None)
+
+
+@contextmanager
+def tracking_deleted_posts():
+    token = deleting_posts.set(set())
+    try:
+        yield
+    finally:
+        deleting_posts.reset(token)
+
 
 class Group(models.Model):
     title = models.CharField(max_length=200)
@@ -13,6 +40,20 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        posts_bulk_created.send(sender=self.model, objs=objs)
+        return objs
+
+    def delete(self):
+        with tracking_deleted_posts():
+            return super().delete()
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+
 class Post(models.Model):
     text = models.TextField(
         'Текст поста',
@@ -40,14 +81,61 @@ class Post(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=image_storage,
         blank=True
     )
+    comment_count = models.PositiveIntegerField(
+        'Число комментариев',
+        default=0,
+        editable=False
+    )
+    last_comment_at = models.DateTimeField(
+        'Последний комментарий',
+        blank=True,
+        null=True,
+        editable=False
+    )
+
+    objects = PostQuerySet.as_manager()
 
     def __str__(self):
         return self.text[:15]
 
+    def save(self, force_insert=False, force_update=False, using=None,
+             update_fields=None):
+        # Значения счётчиков в памяти могли устареть, пока пост
+        # редактировали: обычное сохранение их не перезаписывает. Если
+        # строки уже нет, сохранение обычное и вставит её заново.
+        using = using or router.db_for_write(type(self), instance=self)
+        if (not self._state.adding and update_fields is None
+                and not force_insert
+                and Post.objects.using(using).filter(pk=self.pk).exists()):
+            deferred = self.get_deferred_fields()
+            update_fields = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in COUNTER_FIELDS
+                and field.attname not in deferred
+            ]
+        super().save(force_insert, force_update, using, update_fields)
+
+    def delete(self, using=None, keep_parents=False):
+        with tracking_deleted_posts():
+            return super().delete(using, keep_parents)
+
     class Meta:
-        ordering = ['-pub_date']
+        ordering = ['-pub_date', '-id']
+        indexes = [
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_pub_date_idx'
+            ),
+            models.Index(fields=['-pub_date', '-id'], name='post_feed_idx'),
+        ]
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
 
@@ -72,3 +160,51 @@ class Comment(models.Model):
         'Дата публикации',
         auto_now_add=True
     )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['post', 'created'], name='comment_post_created_idx'
+            ),
+        ]
+
+
+class Counter(models.Model):
+    name = models.CharField('Ключ', max_length=64, unique=True)
+    value = models.IntegerField('Значение', default=0)
+
+    def __str__(self):
+        return f'{self.name}={self.value}'
+
+    class Meta:
+        verbose_name = 'Счётчик'
+        verbose_name_plural = 'Счётчики'
+
+
+class Rendition(models.Model):
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='renditions',
+        verbose_name='Пост'
+    )
+    name = models.CharField('Вариант', max_length=32)
+    url = models.CharField('Адрес', max_length=255, blank=True)
+    failed = models.BooleanField('Ошибка генерации', default=False)
+    attempts = models.PositiveSmallIntegerField('Попытки', default=0)
+    available_at = models.DateTimeField(
+        'Доступно воркеру с', default=timezone.now
+    )
+    created = models.DateTimeField('Поставлено в очередь', auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.post_id}:{self.name}'
+
+    @property
+    def is_ready(self):
+        return bool(self.url)
+
+    class Meta:
+        unique_together = ('post', 'name')
+        verbose_name = 'Превью картинки'
+        verbose_name_plural = 'Превью картинок'
@@ -0,0 +1,226 @@
+"""
+Полнотекстовый поиск по текстам постов и комментариев.
+
+На SQLite используется виртуальная таблица FTS5, которую держат в
+актуальном состоянии триггеры базы (они видят и bulk_create, и update).
+На остальных СУБД работает инвертированный индекс в памяти процесса:
+он строится при первом запросе и дальше обновляется сигналами моделей.
+"""
+import bisect
+import re
+import threading
+
+from django.db import connection
+
+from .models import Comment, Post
+
+WORD_RE = re.compile(r'\w+')
+QUERY_TOKEN_RE = re.compile(r'\w+\*?')
+MAX_TOKENS = 8
+
+
+def tokenize(text):
+    return WORD_RE.findall(text.lower())
+
+
+def split_prefix(token):
+    """Звёздочка в конце слова включает поиск по префиксу: 'туман*'."""
+    if token.endswith('*'):
+        return token[:-1], True
+    return token, False
+
+
+def query_tokens(query):
+    tokens = QUERY_TOKEN_RE.findall(query.lower())
+    return list(dict.fromkeys(tokens))[:MAX_TOKENS]
+
+
+class SQLiteSearchBackend:
+    """
+    Документ поста хранится под rowid = id * 2, комментария — id * 2 + 1,
+    поэтому триггеры обновляют и удаляют строки индекса по ключу.
+    """
+    table = 'posts_search'
+    schema = [
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5('
+        'text, post_id UNINDEXED, prefix="2 3", '
+        'tokenize="unicode61 remove_diacritics 2")',
+    ]
+    triggers = [
+        f'CREATE TRIGGER IF NOT EXISTS {table}_post_ai '
+        'AFTER INSERT ON posts_post BEGIN '
+        f'INSERT INTO {table}(rowid, text, post_id) '
+        'VALUES (new.id * 2, new.text, new.id); END',
+        f'CREATE TRIGGER IF NOT EXISTS {table}_post_au '
+        'AFTER UPDATE OF text ON posts_post BEGIN '
+        f'UPDATE {table} SET text = new.text WHERE rowid = new.id * 2; END',
+        f'CREATE TRIGGER IF NOT EXISTS {table}_post_ad '
+        'AFTER DELETE ON posts_post BEGIN '
+        f'DELETE FROM {table} WHERE rowid = old.id * 2; END',
+        f'CREATE TRIGGER IF NOT EXISTS {table}_comment_ai '
+        'AFTER INSERT ON posts_comment BEGIN '
+        f'INSERT INTO {table}(rowid, text, post_id) '
+        'VALUES (new.id * 2 + 1, new.text, new.post_id); END',
+        f'CREATE TRIGGER IF NOT EXISTS {table}_comment_au '
+        'AFTER UPDATE OF text ON posts_comment BEGIN '
+        f'UPDATE {table} SET text = new.text '
+        'WHERE rowid = new.id * 2 + 1; END',
+        f'CREATE TRIGGER IF NOT EXISTS {table}_comment_ad '
+        'AFTER DELETE ON posts_comment BEGIN '
+        f'DELETE FROM {table} WHERE rowid = old.id * 2 + 1; END',
+    ]
+
+    def install(self, using_connection):
+        with using_connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = %s", [self.table]
+            )
+            created = cursor.fetchone() is None
+            for statement in self.schema + self.triggers:
+                cursor.execute(statement)
+        if created:
+            self.rebuild(using_connection)
+
+    def rebuild(self, using_connection=connection):
+        with using_connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+            cursor.execute(
+                f'INSERT INTO {self.table}(rowid, text, post_id) '
+                'SELECT id * 2, text, id FROM posts_post'
+            )
+            cursor.execute(
+                f'INSERT INTO {self.table}(rowid, text, post_id) '
+                'SELECT id * 2 + 1, text, post_id FROM posts_comment'
+            )
+
+    def match(self, tokens):
+        terms = []
+        for token in tokens:
+            word, prefix = split_prefix(token)
+            terms.append(f'"{word}"*' if prefix else f'"{word}"')
+        return ' '.join(terms)
+
+    def filter(self, queryset, tokens):
+        # RawSQL внутри id__in оборачивается в лишние скобки, и SQLite
+        # сравнивает id только с первой строкой подзапроса.
+        return queryset.extra(
+            where=[
+                f'{queryset.model._meta.db_table}.id IN (SELECT post_id '
+                f'FROM {self.table} WHERE {self.table} MATCH %s)'
+            ],
+            params=[self.match(tokens)],
+        )
+
+
+class InvertedIndexBackend:
+    """Индекс «слово -> id постов»; префиксы ищутся через bisect."""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.built = False
+        self.postings = {}
+        self.documents = {}
+        self.vocabulary = []
+        self.vocabulary_dirty = False
+
+    def _add(self, key, post_id, text):
+        self._remove(key)
+        tokens = set(tokenize(text))
+        self.documents[key] = (post_id, tokens)
+        for token in tokens:
+            if token not in self.postings:
+                self.postings[token] = {}
+                self.vocabulary_dirty = True
+            posting = self.postings[token]
+            posting[post_id] = posting.get(post_id, 0) + 1
+
+    def _remove(self, key):
+        post_id, tokens = self.documents.pop(key, (None, ()))
+        for token in tokens:
+            posting = self.postings[token]
+            posting[post_id] -= 1
+            if not posting[post_id]:
+                del posting[post_id]
+            if not posting:
+                del self.postings[token]
+                self.vocabulary_dirty = True
+
+    def build(self):
+        with self.lock:
+            self.postings = {}
+            self.documents = {}
+            posts = Post.objects.values_list('id', 'text')
+            for post_id, text in posts.iterator(chunk_size=2000):
+                self._add(('post', post_id), post_id, text)
+            comments = Comment.objects.values_list('id', 'post_id', 'text')
+            for comment_id, post_id, text in comments.iterator(
+                chunk_size=2000
+            ):
+                self._add(('comment', comment_id), post_id, text)
+            self.vocabulary_dirty = True
+            self.built = True
+
+    rebuild = build
+
+    def index(self, kind, pk, post_id, text):
+        with self.lock:
+            if not self.built:
+                return
+            if pk is None:
+                self.built = False
+                return
+            self._add((kind, pk), post_id, text)
+
+    def remove(self, kind, pk):
+        with self.lock:
+            if self.built:
+                self._remove((kind, pk))
+
+    def _matches(self, token):
+        word, prefix = split_prefix(token)
+        if not prefix:
+            return set(self.postings.get(word, ()))
+        if self.vocabulary_dirty:
+            self.vocabulary = sorted(self.postings)
+            self.vocabulary_dirty = False
+        found = set()
+        position = bisect.bisect_left(self.vocabulary, word)
+        while position < len(self.vocabulary):
+            candidate = self.vocabulary[position]
+            if not candidate.startswith(word):
+                break
+            found.update(self.postings[candidate])
+            position += 1
+        return found
+
+    def post_ids(self, tokens):
+        with self.lock:
+            if not self.built:
+                self.build()
+            result = None
+            for token in tokens:
+                matches = self._matches(token)
+                result = matches if result is None else result & matches
+                if not result:
+                    return set()
+            return result or set()
+
+    def filter(self, queryset, tokens):
+        return queryset.filter(id__in=list(self.post_ids(tokens)))
+
+
+sqlite_backend = SQLiteSearchBackend()
+memory_backend = InvertedIndexBackend()
+
+
+def get_backend():
+    if connection.vendor == 'sqlite':
+        return sqlite_backend
+    return memory_backend
+
+
+def search_posts(queryset, query):
+    tokens = query_tokens(query)
+    if not tokens:
+        return queryset.none()
+    return get_backend().filter(queryset, tokens)
@@ -0,0 +1,108 @@
+from django.db import connections
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save,
+)
+from django.dispatch import receiver
+
+from . import cache, counters, thumbnails
+from .search import memory_backend, sqlite_backend
+from .models import (
+    Comment, Counter, Group, Post, deleting_posts, posts_bulk_created,
+)
+
+
+@receiver(pre_save, sender=Post)
+def remember_saved_post(sender, instance, raw, **kwargs):
+    instance._saved_state = None
+    if instance.pk is not None and not raw:
+        instance._saved_state = Post.objects.filter(
+            pk=instance.pk
+        ).values_list('author_id', 'group_id', 'image').first()
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    tags = cache.post_tags(
+        instance.author_id, instance.group_id, instance.pk
+    )
+    saved_state = getattr(instance, '_saved_state', None)
+    if created:
+        counters.add_posts([instance])
+        thumbnails.enqueue(instance)
+    elif saved_state is not None:
+        author_id, group_id, image = saved_state
+        counters.move_post(instance, author_id, group_id)
+        tags += cache.post_tags(author_id, group_id)
+        if image != instance.image.name:
+            thumbnails.enqueue(instance)
+    cache.bump(*tags)
+    memory_backend.index('post', instance.pk, instance.pk, instance.text)
+
+
+@receiver(posts_bulk_created, sender=Post)
+def posts_created(sender, objs, **kwargs):
+    counters.add_posts(objs)
+    cache.bump(*(
+        tag for post in objs
+        for tag in cache.post_tags(post.author_id, post.group_id, post.pk)
+    ))
+    for post in objs:
+        memory_backend.index('post', post.pk, post.pk, post.text)
+
+
+@receiver(pre_delete, sender=Post)
+def post_deleting(sender, instance, **kwargs):
+    posts = deleting_posts.get()
+    if posts is not None:
+        posts.add(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    counters.remove_posts([instance])
+    cache.bump(*cache.post_tags(
+        instance.author_id, instance.group_id, instance.pk
+    ))
+    memory_backend.remove('post', instance.pk)
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, **kwargs):
+    cache.bump('posts', f'group:{instance.pk}')
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    Counter.objects.filter(name=counters.group_key(instance.pk)).delete()
+    cache.bump('posts', f'group:{instance.pk}')
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        counters.add_comment(instance)
+    memory_backend.index(
+        'comment', instance.pk, instance.post_id, instance.text
+    )
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    # При каскадном удалении поста его счётчики пересчитывать незачем.
+    if instance.post_id not in (deleting_posts.get() or ()):
+        counters.remove_comment(instance)
+    memory_backend.remove('comment', instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    # Комментарии видны только на страницах, где отрендерен сам пост,
+    # а такие страницы зависят от его тега.
+    cache.bump(*cache.comment_tags(instance.post_id))
+
+
+def install_search(sender, using, **kwargs):
+    connection = connections[using]
+    if connection.vendor == 'sqlite':
+        sqlite_backend.install(connection)
@@ -0,0 +1,12 @@
+from django import template
+
+from posts.cache import add_page_tags, card_tags
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def add_card_tags(context, page_obj):
+    """Теги карточек страницы: вызывается внутри {% cache %} ленты."""
+    add_page_tags(context['request'], *card_tags(page_obj))
+    return ''
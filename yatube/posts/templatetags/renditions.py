@@ -0,0 +1,16 @@
+from django import template
+
+from posts.thumbnails import ready_url, resolve
+
+register = template.Library()
+
+
+@register.simple_tag
+def rendition(post, name):
+    return ready_url(post, name)
+
+
+@register.simple_tag
+def resolve_renditions(page_obj):
+    resolve(page_obj)
+    return ''
@@ -0,0 +1,22 @@
+from django.test import TestCase
+
+from ..benchmark import percentile, seed
+from ..models import Comment, Group, Post, User
+
+
+class BenchmarkTests(TestCase):
+    def test_seed_tops_up(self):
+        """seed дополняет базу до нужного размера, а не удваивает её."""
+        seed(30, authors=3, groups=2, comments_per_post=0.5)
+        seed(50, authors=3, groups=2, comments_per_post=0.5)
+        self.assertEqual(Post.objects.count(), 50)
+        self.assertEqual(Comment.objects.count(), 25)
+        self.assertEqual(User.objects.count(), 3)
+        self.assertEqual(Group.objects.count(), 2)
+
+    def test_percentile(self):
+        """Перцентили считаются по отсортированной выборке."""
+        samples = list(range(100, 0, -1))
+        self.assertEqual(percentile(samples, 50), 51)
+        self.assertEqual(percentile(samples, 99), 99)
+        self.assertEqual(percentile([7], 99), 7)
@@ -0,0 +1,113 @@
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from .. import counters
+from ..models import Group, Post, User
+
+
+class ImportExportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='test')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        Post.objects.create(author=cls.user, group=cls.group, text='Первый')
+        Post.objects.create(author=cls.user, text='Второй, "с кавычками"')
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def round_trip(self, name):
+        path = os.path.join(self.directory, name)
+        exported = list(Post.objects.order_by('id').values_list(
+            'text', 'pub_date', 'author__username', 'group__slug'
+        ))
+        call_command('export_posts', path, stdout=StringIO())
+        Post.objects.all().delete()
+        out = StringIO()
+        call_command('import_posts', path, '--batch-size=1', stdout=out)
+        self.assertIn('Загружено постов: 2, пропущено: 0', out.getvalue())
+        imported = list(Post.objects.order_by('id').values_list(
+            'text', 'pub_date', 'author__username', 'group__slug'
+        ))
+        self.assertEqual(imported, exported)
+        self.assertEqual(counters.group_post_count(self.group.pk), 1)
+
+    def test_jsonl_round_trip(self):
+        """Выгрузка в JSON Lines загружается обратно без потерь."""
+        self.round_trip('posts.jsonl')
+
+    def test_csv_round_trip(self):
+        """Выгрузка в CSV загружается обратно без потерь."""
+        self.round_trip('posts.csv')
+
+    def test_unknown_author_and_group(self):
+        """Посты неизвестных авторов пропускаются или авторы создаются."""
+        path = os.path.join(self.directory, 'posts.jsonl')
+        with open(path, 'w', encoding='utf-8') as stream:
+            stream.write(
+                '{"text": "Новый", "author": "stranger", "group": "new", '
+                '"pub_date": "2021-05-01T10:00:00"}\n'
+            )
+        out = StringIO()
+        call_command('import_posts', path, stdout=out)
+        self.assertIn('пропущено: 1', out.getvalue())
+        call_command('import_posts', path, '--create-missing', stdout=out)
+        post = Post.objects.get(text='Новый')
+        self.assertEqual(post.author.username, 'stranger')
+        self.assertEqual(post.group.slug, 'new')
+        self.assertEqual(
+            post.pub_date, datetime(2021, 5, 1, 10, tzinfo=timezone.utc)
+        )
+
+    def test_batch_keeps_each_pub_date(self):
+        """Даты из файла сохраняются у каждого поста пачки."""
+        path = os.path.join(self.directory, 'posts.jsonl')
+        with open(path, 'w', encoding='utf-8') as stream:
+            for day in range(1, 4):
+                stream.write(
+                    f'{{"text": "день {day}", "author": "{self.user}", '
+                    f'"pub_date": "2021-05-0{day}T10:00:00"}}\n'
+                )
+        call_command('import_posts', path, stdout=StringIO())
+        for day in range(1, 4):
+            self.assertEqual(
+                Post.objects.get(text=f'день {day}').pub_date,
+                datetime(2021, 5, day, 10, tzinfo=timezone.utc),
+            )
+        self.assertTrue(Post._meta.get_field('pub_date').auto_now_add)
+
+    def test_pub_date_with_offset(self):
+        """Даты со смещением приводятся к UTC и сортируются как моменты."""
+        path = os.path.join(self.directory, 'posts.jsonl')
+        with open(path, 'w', encoding='utf-8') as stream:
+            for text, moment in (
+                ('раньше', '2021-05-01T12:00:00+03:00'),
+                ('позже', '2021-05-01T10:00:00+01:00'),
+            ):
+                stream.write(
+                    f'{{"text": "{text}", "author": "{self.user}", '
+                    f'"pub_date": "{moment}"}}\n'
+                )
+        call_command('import_posts', path, stdout=StringIO())
+        self.assertEqual(
+            Post.objects.get(text='раньше').pub_date,
+            datetime(2021, 5, 1, 9, tzinfo=timezone.utc),
+        )
+        self.assertEqual(
+            list(Post.objects.filter(
+                text__in=['раньше', 'позже']
+            ).values_list('text', flat=True)),
+            ['позже', 'раньше'],
+        )
@@ -0,0 +1,86 @@
+import json
+from http import HTTPStatus
+from xml.etree import ElementTree
+
+from django.http import StreamingHttpResponse
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Group, Post, User
+
+
+class FeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='test')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            slug='test-slug'
+        )
+        for i in range(3):
+            Post.objects.create(
+                author=cls.user, text=f'текст <{i}> & co', group=cls.group
+            )
+        cls.feeds = (
+            reverse('posts:index_feed', kwargs={'feed_format': 'rss'}),
+            reverse(
+                'posts:group_feed',
+                kwargs={'slug': cls.group.slug, 'feed_format': 'atom'}
+            ),
+            reverse(
+                'posts:profile_feed',
+                kwargs={'username': cls.user.username, 'feed_format': 'json'}
+            ),
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def read(self, response):
+        self.assertIsInstance(response, StreamingHttpResponse)
+        return b''.join(response.streaming_content)
+
+    def test_feeds_are_streamed_and_valid(self):
+        """Ленты отдаются потоком и разбираются как XML и JSON."""
+        rss, atom, json_feed = [
+            self.read(self.guest_client.get(url, {'limit': 2}))
+            for url in FeedTests.feeds
+        ]
+        self.assertEqual(
+            len(ElementTree.fromstring(rss).findall('channel/item')), 2
+        )
+        entries = ElementTree.fromstring(atom).findall(
+            '{http://www.w3.org/2005/Atom}entry'
+        )
+        self.assertEqual(len(entries), 2)
+        items = json.loads(json_feed)['items']
+        self.assertEqual(len(items), 2)
+        self.assertEqual(items[0]['content_text'], 'текст <2> & co')
+
+    def test_feeds_support_conditional_get(self):
+        """Запрос с прежним ETag получает 304, пока не появится запись."""
+        for url in FeedTests.feeds:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.read(response)
+                etag = response['ETag']
+                self.assertTrue(response.has_header('Last-Modified'))
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+                Post.objects.create(
+                    author=FeedTests.user, text='новый', group=FeedTests.group
+                )
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_unknown_feed_format(self):
+        """Неизвестный формат ленты — 404."""
+        response = self.guest_client.get(
+            reverse('posts:index_feed', kwargs={'feed_format': 'xls'})
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
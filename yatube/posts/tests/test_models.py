@@ -1,6 +1,14 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models.signals import post_delete
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
-from ..models import Group, Post, User
+from .. import counters
+from ..models import Comment, Group, Post, User, deleting_posts
 
 
 class PostModelTest(TestCase):
@@ -55,3 +63,169 @@ class PostModelTest(TestCase):
         for field, help_t in field_help:
             with self.subTest(field=field):
                 self.assertEqual(post._meta.get_field(field).help_text, help_t)
+
+
+class PostCounterTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='counter')
+        cls.group = Group.objects.create(
+            title='test group',
+            slug='counter-group',
+            description='test description',
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def assert_counts(self, total, author, group):
+        self.assertEqual(counters.post_count(), total)
+        self.assertEqual(
+            counters.author_post_count(PostCounterTest.user.pk), author
+        )
+        self.assertEqual(
+            counters.group_post_count(PostCounterTest.group.pk), group
+        )
+
+    def test_counters_follow_post_writes(self):
+        """Счётчики постов меняются при создании, правке и удалении."""
+        post = Post.objects.create(
+            author=PostCounterTest.user,
+            text='test text',
+            group=PostCounterTest.group,
+        )
+        self.assert_counts(1, 1, 1)
+        Post.objects.bulk_create(
+            Post(author=PostCounterTest.user, text=f'text {i}')
+            for i in range(3)
+        )
+        self.assert_counts(4, 4, 1)
+        post.group = None
+        post.save()
+        self.assert_counts(4, 4, 0)
+        post.delete()
+        self.assert_counts(3, 3, 0)
+
+    def test_counter_read_uses_single_query(self):
+        """Прочитать готовый счётчик можно одним запросом."""
+        counters.author_post_count(PostCounterTest.user.pk)
+        with self.assertNumQueries(1):
+            counters.author_post_count(PostCounterTest.user.pk)
+
+
+class CommentCounterTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='commenter')
+        cls.post = Post.objects.create(author=cls.user, text='test text')
+
+    def assert_comments(self, count, last):
+        post = Post.objects.get(pk=CommentCounterTest.post.pk)
+        self.assertEqual(post.comment_count, count)
+        self.assertEqual(post.last_comment_at, last)
+
+    def test_comment_count_follows_comment_writes(self):
+        """comment_count и last_comment_at меняются вместе с комментариями."""
+        first = Comment.objects.create(
+            post=CommentCounterTest.post,
+            author=CommentCounterTest.user,
+            text='first',
+        )
+        second = Comment.objects.create(
+            post=CommentCounterTest.post,
+            author=CommentCounterTest.user,
+            text='second',
+        )
+        self.assert_comments(2, second.created)
+        second.delete()
+        self.assert_comments(1, first.created)
+        first.delete()
+        self.assert_comments(0, None)
+
+    def test_post_edit_keeps_concurrent_comment(self):
+        """Сохранение поста не затирает параллельно добавленный комментарий."""
+        post = Post.objects.get(pk=CommentCounterTest.post.pk)
+        comment = Comment.objects.create(
+            post=post, author=CommentCounterTest.user, text='concurrent'
+        )
+        post.text = 'edited text'
+        post.save()
+        self.assert_comments(1, comment.created)
+        self.assertEqual(
+            Post.objects.get(pk=post.pk).text, 'edited text'
+        )
+
+    def test_post_delete_skips_comment_counter_updates(self):
+        """Каскадное удаление комментариев не пересчитывает счётчики поста."""
+        post = Post.objects.create(
+            author=CommentCounterTest.user, text='doomed'
+        )
+        for i in range(3):
+            Comment.objects.create(
+                post=post, author=CommentCounterTest.user, text=f'text {i}'
+            )
+        with CaptureQueriesContext(connection) as queries:
+            post.delete()
+        self.assertFalse(any(
+            query['sql'].startswith('UPDATE "posts_post"')
+            for query in queries
+        ))
+        comment = Comment.objects.create(
+            post=CommentCounterTest.post,
+            author=CommentCounterTest.user,
+            text='still counted',
+        )
+        comment.delete()
+        self.assert_comments(0, None)
+
+    def test_failed_post_delete_forgets_posts(self):
+        """После неудачного удаления пост не считается удаляемым."""
+        post = Post.objects.create(
+            author=CommentCounterTest.user, text='survivor'
+        )
+        Comment.objects.create(
+            post=post, author=CommentCounterTest.user, text='first'
+        )
+
+        def fail(**kwargs):
+            raise RuntimeError
+
+        post_delete.connect(fail, sender=Comment)
+        try:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                post.delete()
+        finally:
+            post_delete.disconnect(fail, sender=Comment)
+        self.assertIsNone(deleting_posts.get())
+        comment = Comment.objects.create(
+            post=post, author=CommentCounterTest.user, text='second'
+        )
+        comment.delete()
+        self.assertEqual(Post.objects.get(pk=post.pk).comment_count, 1)
+
+    def test_save_after_concurrent_delete(self):
+        """Пост, строку которого удалили, сохраняется заново."""
+        post = Post.objects.create(
+            author=CommentCounterTest.user, text='deleted elsewhere'
+        )
+        Post.objects.filter(pk=post.pk).delete()
+        post.text = 'saved again'
+        post.save()
+        self.assertEqual(Post.objects.get(pk=post.pk).text, 'saved again')
+
+    def test_recount_comments(self):
+        """recount_comments чинит счётчики после bulk_create."""
+        Comment.objects.bulk_create(
+            Comment(
+                post=CommentCounterTest.post,
+                author=CommentCounterTest.user,
+                text=f'text {i}',
+            )
+            for i in range(3)
+        )
+        self.assert_comments(0, None)
+        call_command('recount_comments', '--batch-size=1', stdout=StringIO())
+        last = Comment.objects.latest('created').created
+        self.assert_comments(3, last)
@@ -0,0 +1,177 @@
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Group, Post, User
+from ..views import NUMBER_OF_POSTS
+
+
+class ViewQueryCountTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='test')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            slug='test-slug'
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='тестовый текст',
+            group=cls.group,
+        )
+        Comment.objects.create(
+            post=cls.post, author=cls.user, text='комментарий'
+        )
+        cls.urls = (
+            (reverse('posts:index'), 2),
+            (
+                reverse('posts:group_list', kwargs={'slug': cls.group.slug}),
+                4
+            ),
+            (
+                reverse('posts:profile', kwargs={'username': cls.user}),
+                4
+            ),
+            (
+                reverse('posts:post_detail', kwargs={'post_id': cls.post.id}),
+                4
+            ),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def count_queries(self, url):
+        self.guest_client.get(url)
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            self.guest_client.get(url)
+        return len(context)
+
+    def test_views_use_fixed_number_of_queries(self):
+        """Число запросов не зависит от числа постов и комментариев."""
+        few = {url: self.count_queries(url) for url, _ in self.urls}
+        authors = [
+            User.objects.create(username=f'author{i}')
+            for i in range(NUMBER_OF_POSTS)
+        ]
+        for author in authors:
+            Post.objects.create(
+                author=author, text='текст', group=ViewQueryCountTests.group
+            )
+            Comment.objects.create(
+                post=ViewQueryCountTests.post, author=author, text='текст'
+            )
+        for url, expected in self.urls:
+            with self.subTest(url=url):
+                self.assertEqual(few[url], expected)
+                self.assertEqual(self.count_queries(url), expected)
+
+    def test_not_modified_before_rendering(self):
+        """Повторный запрос с ETag получает 304 без рендеринга шаблона."""
+        for url, _ in self.urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                etag = response['ETag']
+                with CaptureQueriesContext(connection) as context:
+                    response = self.guest_client.get(
+                        url, HTTP_IF_NONE_MATCH=etag
+                    )
+                self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+                self.assertLessEqual(len(context), 1)
+                response = self.guest_client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+                )
+                self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        Comment.objects.create(
+            post=ViewQueryCountTests.post,
+            author=ViewQueryCountTests.user,
+            text='новый комментарий',
+        )
+        url = self.urls[-1][0]
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertContains(response, 'новый комментарий')
+
+    def test_etag_depends_on_user(self):
+        """Гость и автор не получают ETag друг друга."""
+        url = self.urls[-1][0]
+        etag = self.guest_client.get(url)['ETag']
+        author_client = Client()
+        author_client.force_login(ViewQueryCountTests.user)
+        response = author_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertFalse(response.has_header('Last-Modified'))
+
+    def test_guest_pages_are_shared(self):
+        """Гости получают общую копию страницы без запросов к базе."""
+        author_client = Client()
+        author_client.force_login(ViewQueryCountTests.user)
+        for url, _ in self.urls[:3]:
+            with self.subTest(url=url):
+                content = Client().get(url).content
+                with CaptureQueriesContext(connection) as context:
+                    response = self.guest_client.get(url)
+                self.assertEqual(len(context), 0)
+                self.assertEqual(response.content, content)
+                self.assertNotContains(response, 'Новая запись')
+                self.assertContains(author_client.get(url), 'Новая запись')
+                Post.objects.create(
+                    author=ViewQueryCountTests.user,
+                    group=ViewQueryCountTests.group,
+                    text=f'свежий пост {url}',
+                )
+                self.assertContains(
+                    self.guest_client.get(url), f'свежий пост {url}'
+                )
+
+    def test_cached_feed_does_not_read_posts(self):
+        """При попадании в кеш ленты посты страницы не читаются."""
+        author_client = Client()
+        author_client.force_login(ViewQueryCountTests.user)
+        for url, _ in self.urls[:3]:
+            with self.subTest(url=url):
+                content = author_client.get(f'{url}?x=1').content
+                # Посторонний параметр не заводит новую запись тегов.
+                with CaptureQueriesContext(connection) as context:
+                    response = author_client.get(f'{url}?x=2')
+                self.assertEqual(response.content, content)
+                self.assertFalse(any(
+                    'FROM "posts_post"' in query['sql'] for query in context
+                ))
+                Comment.objects.create(
+                    post=ViewQueryCountTests.post,
+                    author=ViewQueryCountTests.user,
+                    text='ещё комментарий',
+                )
+                self.assertNotEqual(author_client.get(url).content, content)
+
+    def test_writes_purge_only_affected_pages(self):
+        """Комментарий сбрасывает только страницы, где показан пост."""
+        for number in range(NUMBER_OF_POSTS):
+            Post.objects.create(
+                author=User.objects.create(username=f'author{number}'),
+                text='текст',
+            )
+        first = reverse('posts:index')
+        second = f'{first}?page=2'
+        for url in (first, second):
+            self.guest_client.get(url)
+        Comment.objects.create(
+            post=ViewQueryCountTests.post,
+            author=ViewQueryCountTests.user,
+            text='новый комментарий',
+        )
+        with CaptureQueriesContext(connection) as context:
+            self.guest_client.get(first)
+        self.assertEqual(len(context), 0)
+        self.assertContains(self.guest_client.get(second), 'Комментариев: 2')
+        about = reverse('about:author')
+        self.guest_client.get(about)
+        self.assertEqual(self.guest_client.get(about).templates, [])
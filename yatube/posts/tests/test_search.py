@@ -0,0 +1,92 @@
+from urllib.parse import urlencode
+
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Post, User
+from ..search import InvertedIndexBackend, search_posts
+from ..views import NUMBER_OF_POSTS
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='test')
+        cls.post = Post.objects.create(
+            author=cls.user, text='Ёжик в тумане'
+        )
+        cls.other = Post.objects.create(
+            author=cls.user, text='Котики и собаки'
+        )
+        Comment.objects.create(
+            post=cls.other, author=cls.user, text='Настоящий туманный день'
+        )
+        cls.search_url = reverse('posts:search')
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def found(self, query):
+        return set(search_posts(Post.objects.all(), query))
+
+    def test_search_posts_and_comments(self):
+        """Поиск находит посты по тексту поста и его комментариев."""
+        cases = [
+            ('ёжик', {SearchTests.post}),
+            ('котики собаки', {SearchTests.other}),
+            ('тумане', {SearchTests.post}),
+            ('туман*', {SearchTests.post, SearchTests.other}),
+            ('котики ёжик', set()),
+            ('', set()),
+        ]
+        for query, expected in cases:
+            with self.subTest(query=query):
+                self.assertEqual(self.found(query), expected)
+
+    def test_search_follows_writes(self):
+        """Индекс обновляется при правке и удалении."""
+        post = SearchTests.post
+        post.text = 'Совсем другой текст'
+        post.save()
+        self.assertEqual(self.found('ёжик'), set())
+        self.assertEqual(self.found('другой'), {post})
+        Comment.objects.all().delete()
+        self.assertEqual(self.found('туманный'), set())
+
+    def test_inverted_index_backend(self):
+        """Индекс в памяти отвечает так же и обновляется сигналами."""
+        backend = InvertedIndexBackend()
+        self.assertEqual(
+            backend.post_ids(['туман*']),
+            {SearchTests.post.id, SearchTests.other.id}
+        )
+        backend.index('post', SearchTests.post.id, SearchTests.post.id, 'х')
+        self.assertEqual(
+            backend.post_ids(['туман*']), {SearchTests.other.id}
+        )
+        backend.remove('post', SearchTests.other.id)
+        self.assertEqual(backend.post_ids(['котики']), set())
+
+    def test_search_page(self):
+        """Страница поиска использует пагинатор ленты."""
+        response = self.guest_client.get(
+            SearchTests.search_url, {'q': 'котики'}
+        )
+        self.assertTemplateUsed(response, 'posts/search.html')
+        self.assertEqual(
+            list(response.context['page_obj']), [SearchTests.other]
+        )
+
+    def test_search_page_links_keep_query(self):
+        """Ссылки пагинатора поиска сохраняют поисковую фразу."""
+        Post.objects.bulk_create(
+            Post(author=SearchTests.user, text=f'котики {number}')
+            for number in range(NUMBER_OF_POSTS)
+        )
+        response = self.guest_client.get(
+            SearchTests.search_url, {'q': 'котики', 'utm_source': 'mail'}
+        )
+        link = urlencode({'q': 'котики', 'page': 2}).replace('&', '&amp;')
+        self.assertContains(response, f'href="?{link}"')
+        self.assertNotContains(response, 'utm_source')
@@ -0,0 +1,138 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from ..models import Post, Rendition, User
+from ..thumbnails import claim, pending, process_pending, ready_url, resolve
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class RenditionQueueTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='test')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.post = Post.objects.create(
+            author=RenditionQueueTests.user,
+            text='пост с картинкой',
+            image=SimpleUploadedFile(
+                'small.gif', SMALL_GIF, content_type='image/gif'
+            ),
+        )
+        self.urls = (
+            reverse('posts:index'),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}),
+        )
+
+    def test_image_is_rendered_in_background(self):
+        """Превью готовит воркер, а до этого показывается заглушка."""
+        self.assertEqual(
+            set(self.post.renditions.values_list('name', flat=True)),
+            set(settings.POST_IMAGE_RENDITIONS),
+        )
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertNotContains(response, '<img class="card-img')
+        self.assertEqual(
+            process_pending(), len(settings.POST_IMAGE_RENDITIONS)
+        )
+        rendition = Rendition.objects.get(post=self.post, name='card')
+        self.assertTrue(rendition.is_ready)
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertContains(response, rendition.url)
+        self.assertEqual(process_pending(), 0)
+
+    def test_image_change_requeues_renditions(self):
+        """Новая картинка заново ставит превью в очередь."""
+        process_pending()
+        other = BytesIO()
+        Image.new('RGB', (3, 2), 'blue').save(other, 'GIF')
+        self.post.image = SimpleUploadedFile(
+            'other.gif', other.getvalue(), content_type='image/gif'
+        )
+        self.post.save()
+        self.assertFalse(
+            Rendition.objects.get(post=self.post, name='card').is_ready
+        )
+
+    def test_warm_thumbnails_fills_missing_renditions(self):
+        """warm_thumbnails готовит превью и для постов без очереди."""
+        Rendition.objects.all().delete()
+        call_command('warm_thumbnails', workers=0, stdout=StringIO())
+        self.assertTrue(
+            Rendition.objects.get(post=self.post, name='card').is_ready
+        )
+
+    def test_page_renditions_are_resolved_in_one_query(self):
+        """Превью всей страницы ленты находятся одним запросом."""
+        for i in range(3):
+            Post.objects.create(
+                author=RenditionQueueTests.user,
+                text=f'пост {i}',
+                image=SimpleUploadedFile(
+                    f'small{i}.gif', SMALL_GIF, content_type='image/gif'
+                ),
+            )
+        process_pending()
+        posts = list(Post.objects.all())
+        with self.assertNumQueries(1):
+            resolve(posts)
+            urls = [ready_url(post, 'card') for post in posts]
+        self.assertTrue(all(urls))
+
+    @override_settings(RENDITION_MAX_ATTEMPTS=2)
+    def test_failed_rendition_is_retried_later(self):
+        """Упавшее превью откладывается и после лимита попыток бросается."""
+        rendition = Rendition.objects.get(post=self.post, name='card')
+        with mock.patch('posts.thumbnails.render', side_effect=OSError), \
+                self.assertLogs('posts.thumbnails', 'ERROR'):
+            self.assertEqual(process_pending(), 1)
+            rendition.refresh_from_db()
+            self.assertEqual(rendition.attempts, 1)
+            self.assertFalse(rendition.failed)
+            self.assertGreater(rendition.available_at, timezone.now())
+            self.assertEqual(process_pending(), 0)
+            Rendition.objects.update(available_at=timezone.now())
+            self.assertEqual(process_pending(), 1)
+        rendition.refresh_from_db()
+        self.assertTrue(rendition.failed)
+        self.assertEqual(rendition.attempts, 2)
+
+    def test_rendition_is_claimed_once(self):
+        """Задачу забирает только один воркер."""
+        first = pending().get(post=self.post, name='card')
+        second = Rendition.objects.get(pk=first.pk)
+        self.assertTrue(claim(first))
+        self.assertFalse(claim(second))
+        self.assertEqual(process_pending(), 0)
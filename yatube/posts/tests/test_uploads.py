@@ -0,0 +1,167 @@
+import shutil
+import struct
+import tempfile
+import zlib
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadhandler import StopUpload
+from django.core.management import call_command
+from django.test import (
+    Client, RequestFactory, TestCase, override_settings,
+)
+from django.urls import reverse
+from PIL import Image
+
+from ..models import Post, Rendition, User
+from ..thumbnails import process_pending
+from ..uploads import (
+    OPTIMIZED, LimitedTemporaryFileUploadHandler, inspect_image,
+)
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def jpeg_with_exif(size=(20, 10)):
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    exif[0x010F] = 'Камера'
+    output = BytesIO()
+    Image.new('RGB', size, 'red').save(output, 'JPEG', exif=exif.tobytes())
+    return output.getvalue()
+
+
+def png_chunk(kind, data):
+    return (
+        struct.pack('>I', len(data)) + kind + data
+        + struct.pack('>I', zlib.crc32(kind + data))
+    )
+
+
+def png_header(width, height):
+    """Заголовок PNG без пиксельных данных: Pillow его не распакует."""
+    ihdr = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return (
+        b'\x89PNG\r\n\x1a\n' + png_chunk(b'IHDR', ihdr)
+        + png_chunk(b'IDAT', b'')
+    )
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class UploadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='test')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(UploadTests.user)
+
+    def upload(self, name, content):
+        return self.authorized_client.post(reverse('posts:post_create'), {
+            'text': 'пост с картинкой',
+            'image': SimpleUploadedFile(name, content),
+        })
+
+    def test_header_is_enough(self):
+        """Формат и размеры читаются из заголовка файла."""
+        self.assertEqual(
+            inspect_image(BytesIO(png_header(5000, 4000))),
+            ('PNG', (5000, 4000)),
+        )
+        self.assertIsNone(inspect_image(BytesIO(b'not an image')))
+
+    def test_rejected_uploads(self):
+        """Слишком большие файлы и картинки и не-картинки не сохраняются."""
+        cases = (
+            ('big.jpg', jpeg_with_exif((400, 400)), 'больше'),
+            ('large.png', png_header(5000, 4000), 'мегапикселей'),
+            ('bomb.png', png_header(30000, 20000), 'мегапикселей'),
+            ('text.jpg', b'not an image', 'JPEG, PNG'),
+        )
+        with self.settings(
+            POST_IMAGE_MAX_BYTES=1024, POST_IMAGE_MAX_PIXELS=10 ** 7
+        ):
+            for name, content, message in cases:
+                with self.subTest(name=name):
+                    response = self.upload(name, content)
+                    self.assertContains(response, message)
+        self.assertFalse(Post.objects.exists())
+
+    def test_upload_is_optimized_in_background(self):
+        """Воркер снимает EXIF, поворачивает и подменяет файл."""
+        response = self.upload('photo.jpeg', jpeg_with_exif())
+        self.assertRedirects(
+            response, reverse('posts:profile', kwargs={'username': 'test'})
+        )
+        post = Post.objects.get()
+        original = post.image.name
+        self.assertTrue(
+            Rendition.objects.filter(post=post, name=OPTIMIZED).exists()
+        )
+        process_pending()
+        post.refresh_from_db()
+        self.assertNotEqual(post.image.name, original)
+        self.assertTrue(post.image.name.endswith('.jpg'))
+        self.assertFalse(post.image.storage.exists(original))
+        with Image.open(post.image) as image:
+            self.assertEqual(image.size, (10, 20))
+            self.assertNotIn('exif', image.info)
+        # Превью исходного файла делаются заново из пережатого.
+        card = Rendition.objects.get(post=post, name='card')
+        self.assertFalse(card.is_ready)
+        self.assertEqual(process_pending(), 1)
+        card.refresh_from_db()
+        self.assertTrue(card.is_ready)
+        self.assertEqual(process_pending(), 0)
+
+    def test_oversized_upload_is_cut_off(self):
+        """Загрузка больше лимита обрывается, остаток тела не читается."""
+        request = RequestFactory().post('/')
+        handler = LimitedTemporaryFileUploadHandler(request)
+        with self.settings(POST_IMAGE_MAX_BYTES=1024):
+            handler.new_file('image', 'big.jpg', 'image/jpeg', None)
+            handler.receive_data_chunk(b'x' * 1024, 0)
+            with self.assertRaises(StopUpload) as raised:
+                handler.receive_data_chunk(b'x', 1024)
+        handler.file.close()
+        self.assertTrue(raised.exception.connection_reset)
+        self.assertTrue(request.upload_exceeds_limit)
+
+    def test_media_gc(self):
+        """Дубликаты ссылаются на один файл, сироты удаляет media_gc."""
+        posts = [
+            Post.objects.create(
+                author=UploadTests.user,
+                text='пост',
+                image=SimpleUploadedFile(f'{number}.jpg', jpeg_with_exif()),
+            )
+            for number in range(2)
+        ]
+        self.assertEqual(posts[0].image.name, posts[1].image.name)
+        legacy = FileSystemStorage().save(
+            'posts/legacy.jpg', ContentFile(jpeg_with_exif((30, 30)))
+        )
+        Post.objects.filter(pk=posts[1].pk).update(image=legacy)
+        orphan = posts[0].image.storage.save(
+            'posts/orphan.jpg', ContentFile(b'orphan')
+        )
+        call_command('media_gc', grace=1, stdout=StringIO())
+        self.assertTrue(posts[0].image.storage.exists(orphan))
+        call_command('media_gc', grace=0, rehash=True, stdout=StringIO())
+        posts[1].refresh_from_db()
+        storage = posts[1].image.storage
+        self.assertTrue(storage.is_hashed(posts[1].image.name))
+        for name in (posts[0].image.name, posts[1].image.name):
+            self.assertTrue(storage.exists(name))
+        for name in (orphan, legacy):
+            self.assertFalse(storage.exists(name))
@@ -3,10 +3,12 @@ import tempfile
 
 from django import forms
 from django.conf import settings
+from django.core.cache import cache
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
-from ..models import Group, Post, User
+from ..models import Comment, Group, Post, User
+from ..views import COMMENTS_PER_PAGE, NUMBER_OF_POSTS
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
@@ -181,3 +183,149 @@ class PostPagesTests(TestCase):
                     self.assertEqual(
                         len(response.context['page_obj']), post_num
                     )
+
+    def test_page_links_drop_foreign_params(self):
+        """Ссылки пагинатора ленты не переносят чужие GET-параметры."""
+        Post.objects.bulk_create(
+            Post(text=f'текст {i}', author=PostPagesTests.user)
+            for i in range(NUMBER_OF_POSTS)
+        )
+        for params in ({'utm_source': 'mail'}, {}):
+            response = self.guest_client.get(
+                PostPagesTests.index_url, params
+            )
+            self.assertContains(response, 'href="?page=2"')
+            self.assertNotContains(response, 'utm_source')
+
+    @override_settings(PAGINATION_CURSOR_THRESHOLD=5)
+    def test_cursor_paginator(self):
+        """Большая лента листается курсором без пропусков и повторов."""
+        Post.objects.bulk_create(
+            Post(
+                text=f'текст {i}',
+                author=PostPagesTests.user,
+                group=PostPagesTests.group,
+            ) for i in range(13)
+        )
+        urls = (
+            PostPagesTests.index_url,
+            PostPagesTests.group_list_url,
+            PostPagesTests.profile_url
+        )
+        expected = list(
+            Post.objects.order_by('-pub_date', '-id').values_list(
+                'id', flat=True
+            )
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                seen = []
+                params = {}
+                while True:
+                    response = self.guest_client.get(url, params)
+                    page_obj = response.context['page_obj']
+                    self.assertTrue(page_obj.paginator.is_cursor)
+                    seen += [post.id for post in page_obj]
+                    self.assertIsNone(page_obj.next_page_number())
+                    self.assertNotContains(response, 'page=')
+                    if not page_obj.has_next():
+                        break
+                    self.assertContains(
+                        response, f'?cursor={page_obj.next_cursor}'
+                    )
+                    params = {'cursor': page_obj.next_cursor}
+                self.assertEqual(seen, expected)
+                response = self.guest_client.get(
+                    url, {'cursor': page_obj.previous_cursor}
+                )
+                self.assertEqual(
+                    [post.id for post in response.context['page_obj']],
+                    expected[:NUMBER_OF_POSTS]
+                )
+                self.assertFalse(response.context['page_obj'].has_previous())
+
+    def test_post_detail_comments_are_paged(self):
+        """Комментарии поста отдаются порциями: страница и фрагмент."""
+        Comment.objects.bulk_create(
+            Comment(
+                post=PostPagesTests.post,
+                author=PostPagesTests.user,
+                text=f'комментарий {i}',
+            ) for i in range(COMMENTS_PER_PAGE + 5)
+        )
+        expected = list(
+            PostPagesTests.post.comments.order_by('created', 'id')
+        )
+        response = self.guest_client.get(
+            PostPagesTests.reverses['post_detail'][1]
+        )
+        comments = response.context['comments']
+        self.assertEqual(list(comments), expected[:COMMENTS_PER_PAGE])
+        self.assertTrue(comments.has_next())
+        response = self.guest_client.get(
+            reverse(
+                'posts:post_comments',
+                kwargs={'post_id': PostPagesTests.post.id}
+            ),
+            {'cursor': comments.next_cursor},
+        )
+        self.assertTemplateUsed(response, 'includes/comments.html')
+        self.assertTemplateNotUsed(response, 'base.html')
+        self.assertEqual(
+            list(response.context['comments']), expected[COMMENTS_PER_PAGE:]
+        )
+        self.assertFalse(response.context['comments'].has_next())
+        self.assertNotContains(response, 'Показать ещё')
+
+    @override_settings(PAGINATION_CURSOR_THRESHOLD=5)
+    def test_cursor_paginator_broken_cursor(self):
+        """Битый курсор открывает первую страницу."""
+        response = self.guest_client.get(
+            PostPagesTests.index_url, {'cursor': 'не-курсор'}
+        )
+        self.assertEqual(
+            response.context['page_obj'][0], PostPagesTests.post
+        )
+
+    @override_settings(PAGINATION_CURSOR_THRESHOLD=5)
+    def test_cursor_page_has_no_indexes(self):
+        """Номера записей курсорной страницы дают понятную ошибку."""
+        page_obj = self.guest_client.get(
+            PostPagesTests.index_url, {'cursor': 'не-курсор'}
+        ).context['page_obj']
+        for method in (page_obj.start_index, page_obj.end_index):
+            with self.subTest(method=method.__name__):
+                with self.assertRaisesMessage(
+                    NotImplementedError, 'нет номеров записей'
+                ):
+                    method()
+
+    def test_feed_cache_is_invalidated_by_writes(self):
+        """Кеш ленты различает страницы и сбрасывается новым постом."""
+        cache.clear()
+        Post.objects.bulk_create(
+            Post(text=f'текст {i}', author=PostPagesTests.user)
+            for i in range(NUMBER_OF_POSTS)
+        )
+        first = self.guest_client.get(PostPagesTests.index_url).content
+        second = self.guest_client.get(
+            PostPagesTests.index_url, {'page': 2}
+        ).content
+        self.assertNotEqual(first, second)
+        self.assertEqual(
+            self.guest_client.get(PostPagesTests.index_url).content, first
+        )
+        for url in (
+            PostPagesTests.index_url,
+            PostPagesTests.group_list_url,
+            PostPagesTests.profile_url
+        ):
+            with self.subTest(url=url):
+                self.guest_client.get(url)
+                Post.objects.create(
+                    text=f'свежий пост {url}',
+                    author=PostPagesTests.user,
+                    group=PostPagesTests.group,
+                )
+                response = self.guest_client.get(url)
+                self.assertContains(response, f'свежий пост {url}')
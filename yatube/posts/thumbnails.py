@@ -0,0 +1,147 @@
+"""
+Очередь превью картинок постов на таблице Rendition.
+
+Строка с пустым url — задача в очереди. Сигнал post_save ставит задачи
+для всех вариантов из settings.POST_IMAGE_RENDITIONS, а воркер
+(manage.py thumbnail_worker) генерирует их через sorl-thumbnail вне
+запроса. Тот же воркер выполняет задачи uploads.OPTIMIZED — пережатие
+загруженных через форму картинок.
+
+Воркер забирает задачу одним UPDATE по available_at: параллельный
+воркер её уже не получит, а задача упавшего воркера вернётся в очередь
+через RENDITION_LEASE_SECONDS. Ошибка откладывает задачу с растущей
+паузой, после RENDITION_MAX_ATTEMPTS попыток она помечается failed.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from sorl.thumbnail import get_thumbnail
+
+from core import metrics
+
+from . import uploads
+from .cache import bump
+from .models import Post, Rendition
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue(post):
+    Rendition.objects.filter(post=post).delete()
+    if post.image:
+        Rendition.objects.bulk_create(
+            Rendition(post=post, name=name)
+            for name in settings.POST_IMAGE_RENDITIONS
+        )
+
+
+def enqueue_missing():
+    """Ставит в очередь превью постов, картинки которых ещё не обработаны."""
+    posts = Post.objects.exclude(image='').values_list('id', flat=True)
+    Rendition.objects.bulk_create(
+        (
+            Rendition(post_id=post_id, name=name)
+            for post_id in posts.iterator()
+            for name in settings.POST_IMAGE_RENDITIONS
+        ),
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+
+
+def render(rendition):
+    if rendition.name == uploads.OPTIMIZED:
+        return uploads.optimize(rendition)
+    options = dict(settings.POST_IMAGE_RENDITIONS[rendition.name])
+    geometry = options.pop('geometry')
+    return get_thumbnail(rendition.post.image, geometry, **options).url
+
+
+def claim(rendition):
+    """Забирает задачу у очереди; False — её уже взял другой воркер."""
+    now = timezone.now()
+    lease = timedelta(
+        seconds=getattr(settings, 'RENDITION_LEASE_SECONDS', 600)
+    )
+    claimed = Rendition.objects.filter(
+        pk=rendition.pk, url='', failed=False, available_at__lte=now
+    ).update(available_at=now + lease, attempts=F('attempts') + 1)
+    if claimed:
+        rendition.available_at = now + lease
+        rendition.attempts += 1
+    return bool(claimed)
+
+
+def retry_later(rendition):
+    if rendition.attempts >= getattr(settings, 'RENDITION_MAX_ATTEMPTS', 5):
+        rendition.failed = True
+    else:
+        delay = getattr(settings, 'RENDITION_RETRY_SECONDS', 60)
+        rendition.available_at = timezone.now() + timedelta(
+            seconds=delay * 2 ** (rendition.attempts - 1)
+        )
+    rendition.save(update_fields=['failed', 'available_at'])
+
+
+def generate(rendition):
+    """Выполняет задачу, если удалось её забрать, и возвращает True."""
+    if not claim(rendition):
+        return False
+    try:
+        with metrics.timer('thumbnail'):
+            url = render(rendition)
+    except Exception:
+        logger.exception(
+            'Не удалось сгенерировать превью %s, попытка %d',
+            rendition, rendition.attempts,
+        )
+        retry_later(rendition)
+        return True
+    if url is None:
+        return True
+    rendition.url = url
+    rendition.save(update_fields=['url'])
+    bump(f'post:{rendition.post_id}')
+    return True
+
+
+def pending():
+    return Rendition.objects.filter(
+        url='', failed=False, available_at__lte=timezone.now(),
+        name__in=[*settings.POST_IMAGE_RENDITIONS, uploads.OPTIMIZED],
+    ).select_related('post').order_by('created', 'id')
+
+
+def process_pending(limit=None):
+    renditions = pending()
+    if limit is not None:
+        renditions = renditions[:limit]
+    return sum(generate(rendition) for rendition in renditions)
+
+
+def resolve(posts):
+    """
+    Одним запросом находит превью для всех постов страницы
+    и раскладывает их по post.rendition_urls.
+    """
+    posts = [post for post in posts if post.image]
+    if not posts:
+        return
+    urls = {post.pk: {} for post in posts}
+    rows = Rendition.objects.filter(
+        post__in=list(urls)
+    ).exclude(url='').values_list('post_id', 'name', 'url')
+    for post_id, name, url in rows:
+        urls[post_id][name] = url
+    for post in posts:
+        post.rendition_urls = urls[post.pk]
+
+
+def ready_url(post, name):
+    """URL готового превью или None, пока воркер его не сделал."""
+    if not hasattr(post, 'rendition_urls'):
+        resolve([post])
+    return post.rendition_urls.get(name)
@@ -0,0 +1,200 @@
+"""
+Загрузка картинок постов.
+
+Файл пишется на диск порциями (LimitedTemporaryFileUploadHandler), в
+запросе читается только заголовок картинки: формат и размеры. Снятие
+метаданных и пережатие делает фоновый воркер через очередь Rendition
+(задача OPTIMIZED), поэтому память на загрузку не зависит от размера файла.
+"""
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.uploadhandler import (
+    StopUpload, TemporaryFileUploadHandler,
+)
+from django.utils import timezone
+from PIL import Image, ImageFile, ImageOps
+
+from .cache import bump, post_tags
+from .models import Post, Rendition
+
+OPTIMIZED = 'optimized'
+HEADER_CHUNK = 1024
+HEADER_LIMIT = 1024 * 1024
+
+# Формат загрузки -> формат, в котором картинка хранится после пережатия.
+WEB_FORMATS = {
+    'JPEG': 'JPEG',
+    'MPO': 'JPEG',
+    'PNG': 'PNG',
+    'GIF': 'GIF',
+    'WEBP': 'WEBP',
+    'BMP': 'PNG',
+    'TIFF': 'PNG',
+}
+EXTENSIONS = {'JPEG': '.jpg', 'PNG': '.png', 'GIF': '.gif', 'WEBP': '.webp'}
+SAVE_OPTIONS = {
+    'JPEG': {'quality': 85, 'optimize': True, 'progressive': True},
+    'PNG': {'optimize': True},
+    'GIF': {'optimize': True},
+    'WEBP': {'quality': 80, 'method': 4},
+}
+
+
+class LimitedTemporaryFileUploadHandler(TemporaryFileUploadHandler):
+    """
+    Пишет файл во временный файл и обрывает загрузку, как только он
+    превысит POST_IMAGE_MAX_BYTES: остаток тела запроса не читается.
+    Запрос помечается upload_exceeds_limit, по нему форма картинки
+    сообщает об ошибке.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+        self.limit = settings.POST_IMAGE_MAX_BYTES
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > self.limit:
+            self.request.upload_exceeds_limit = True
+            raise StopUpload(connection_reset=True)
+        return super().receive_data_chunk(raw_data, start)
+
+
+def upload_exceeds_limit(request):
+    """
+    Оборвана ли загрузка файла из-за POST_IMAGE_MAX_BYTES. Вызывается
+    после чтения request.POST или request.FILES.
+    """
+    return getattr(request, 'upload_exceeds_limit', False)
+
+
+def inspect_image(file):
+    """
+    Формат и размеры по заголовку файла, без декодирования пикселей.
+    Для заведомых «бомб» Pillow сам бросает Image.DecompressionBombError.
+    """
+    parser = ImageFile.Parser()
+    file.seek(0)
+    read = 0
+    try:
+        while parser.image is None and read < HEADER_LIMIT:
+            chunk = file.read(HEADER_CHUNK)
+            if not chunk:
+                break
+            read += len(chunk)
+            parser.feed(chunk)
+    except (OSError, SyntaxError, ValueError):
+        return None
+    finally:
+        file.seek(0)
+    if parser.image is None:
+        return None
+    return parser.image.format, parser.image.size
+
+
+def too_many_pixels():
+    return ValidationError(
+        'Картинка слишком большая: не больше %(limit)d мегапикселей.',
+        code='too_many_pixels',
+        params={'limit': settings.POST_IMAGE_MAX_PIXELS // 10 ** 6},
+    )
+
+
+def file_too_large():
+    return ValidationError(
+        'Файл больше %(limit)d МБ.',
+        code='file_too_large',
+        params={'limit': settings.POST_IMAGE_MAX_BYTES // 2 ** 20},
+    )
+
+
+def validate_image(file):
+    if file.size > settings.POST_IMAGE_MAX_BYTES:
+        raise file_too_large()
+    try:
+        header = inspect_image(file)
+    except Image.DecompressionBombError:
+        raise too_many_pixels()
+    if header is None or header[0] not in WEB_FORMATS:
+        raise ValidationError(
+            'Загрузите картинку в формате JPEG, PNG, GIF или WebP.',
+            code='invalid_image',
+        )
+    width, height = header[1]
+    if width * height > settings.POST_IMAGE_MAX_PIXELS:
+        raise too_many_pixels()
+
+
+def discard(storage, name):
+    """
+    Удаляет файл, если на него не ссылается ни один пост: одинаковые
+    картинки хранятся одним файлом (core.storage).
+    """
+    if not Post.objects.filter(image=name).exists():
+        storage.delete(name)
+
+
+def enqueue_optimization(post):
+    Rendition.objects.update_or_create(
+        post=post, name=OPTIMIZED, defaults={
+            'url': '', 'failed': False, 'attempts': 0,
+            'available_at': timezone.now(),
+        }
+    )
+
+
+def _encode(image, source_format):
+    web_format = WEB_FORMATS[source_format]
+    options = dict(SAVE_OPTIONS[web_format])
+    frames = getattr(image, 'n_frames', 1)
+    if web_format in ('GIF', 'WEBP') and frames > 1:
+        options.update(save_all=True, loop=image.info.get('loop', 0))
+    else:
+        image = ImageOps.exif_transpose(image)
+        if web_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+    output = BytesIO()
+    # Метаданные (EXIF, ICC, комментарии) не передаются в save и теряются.
+    image.save(output, web_format, **options)
+    return output.getvalue(), EXTENSIONS[web_format]
+
+
+def optimize(rendition):
+    """Пережимает картинку поста и подменяет ею исходный файл."""
+    post = rendition.post
+    storage = post.image.storage
+    old_name = post.image.name
+    with storage.open(old_name) as source:
+        header = inspect_image(source)
+        if header is None or header[0] not in WEB_FORMATS:
+            raise ValueError(f'{old_name}: неподдерживаемый формат')
+        width, height = header[1]
+        if width * height > settings.POST_IMAGE_MAX_PIXELS:
+            raise ValueError(f'{old_name}: слишком много пикселей')
+        with Image.open(source) as image:
+            data, extension = _encode(image, header[0])
+    stem = os.path.splitext(os.path.basename(old_name))[0]
+    new_name = storage.save(
+        post.image.field.generate_filename(post, stem + extension),
+        ContentFile(data),
+    )
+    replaced = Post.objects.filter(pk=post.pk, image=old_name).update(
+        image=new_name
+    )
+    if not replaced:
+        # Пока воркер работал, автор загрузил другую картинку.
+        discard(storage, new_name)
+        return None
+    discard(storage, old_name)
+    post.image.name = new_name
+    # Превью могли успеть сделать из исходного файла: делаем их заново.
+    Rendition.objects.filter(post=post).exclude(name=OPTIMIZED).update(
+        url='', failed=False, attempts=0, available_at=timezone.now()
+    )
+    bump(*post_tags(post.author_id, post.group_id, post.pk))
+    return storage.url(new_name)
@@ -1,8 +1,168 @@
-from django.core.paginator import Paginator
+import base64
+import binascii
 
+from django.conf import settings
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
 
-def paginate(request, items, NUMBER_OF_POSTS):
-    paginator = Paginator(items, NUMBER_OF_POSTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    return page_obj
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+def encode_cursor(direction, values):
+    moment, pk = values
+    raw = f'{direction}|{moment.isoformat()}|{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Разбирает токен курсора, для битого токена возвращает None."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+    except (binascii.Error, UnicodeError, ValueError):
+        return None
+    direction, *values = raw.split('|')
+    if direction not in (NEXT, PREVIOUS) or len(values) != 2:
+        return None
+    moment = parse_datetime(values[0])
+    if moment is None or not values[1].isdigit():
+        return None
+    return direction, (moment, int(values[1]))
+
+
+class CursorPage(Page):
+    """Страница курсорной пагинации: без COUNT(*) и без OFFSET."""
+
+    def __init__(self, paginator, cursor=None):
+        self.paginator = paginator
+        self.number = None
+        self.cursor = cursor
+
+    @cached_property
+    def _window(self):
+        per_page = self.paginator.per_page
+        if self.cursor is None:
+            rows = list(self.paginator.object_list[:per_page + 1])
+            return rows[:per_page], False, len(rows) > per_page
+        direction, position = self.cursor
+        if direction == NEXT:
+            rows = list(
+                self.paginator.seek(position, forward=True)[:per_page + 1]
+            )
+            return rows[:per_page], True, len(rows) > per_page
+        rows = list(
+            self.paginator.seek(position, forward=False)[:per_page + 1]
+        )
+        return rows[:per_page][::-1], len(rows) > per_page, True
+
+    @property
+    def object_list(self):
+        return self._window[0]
+
+    def has_previous(self):
+        return self._window[1]
+
+    def has_next(self):
+        return self._window[2]
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous():
+            return encode_cursor(
+                PREVIOUS, self.paginator.position(self.object_list[0])
+            )
+        return None
+
+    @property
+    def next_cursor(self):
+        if self.has_next():
+            return encode_cursor(
+                NEXT, self.paginator.position(self.object_list[-1])
+            )
+        return None
+
+    def next_page_number(self):
+        """У курсорной страницы нет номера: ссылки строят по next_cursor."""
+        return None
+
+    def previous_page_number(self):
+        return None
+
+    def start_index(self):
+        raise NotImplementedError(
+            'У курсорной страницы нет номеров записей: их нельзя узнать '
+            'без COUNT(*) и OFFSET.'
+        )
+
+    def end_index(self):
+        return self.start_index()
+
+    def __repr__(self):
+        return '<Cursor page>'
+
+
+class CursorPaginator(Paginator):
+    """
+    Пагинатор по ключу (pub_date, id): следующая страница выбирается
+    условием «строго после последней записи» вместо OFFSET.
+    """
+    is_cursor = True
+
+    def __init__(self, object_list, per_page, ordering=('pub_date', 'id'),
+                 descending=True):
+        self.ordering = ordering
+        self.descending = descending
+        sign = '-' if descending else ''
+        super().__init__(
+            object_list.order_by(*(sign + field for field in ordering)),
+            per_page,
+        )
+
+    def position(self, obj):
+        if isinstance(obj, dict):
+            return tuple(obj[field] for field in self.ordering)
+        return tuple(getattr(obj, field) for field in self.ordering)
+
+    def seek(self, position, forward=True):
+        first, second = self.ordering
+        moment, pk = position
+        lookup = 'lt' if forward == self.descending else 'gt'
+        predicate = (
+            Q(**{f'{first}__{lookup}': moment})
+            | Q(**{first: moment, f'{second}__{lookup}': pk})
+        )
+        queryset = self.object_list.filter(predicate)
+        if forward:
+            return queryset
+        return queryset.reverse()
+
+    def get_page(self, cursor_token):
+        cursor = decode_cursor(cursor_token) if cursor_token else None
+        return CursorPage(self, cursor)
+
+
+def is_small(items, count=None):
+    threshold = settings.PAGINATION_CURSOR_THRESHOLD
+    if count is not None:
+        return count <= threshold
+    return not items[threshold:threshold + 1].exists()
+
+
+def paginate(request, items, NUMBER_OF_POSTS, count=None):
+    """
+    count — заранее известное (например, из posts.counters) число
+    записей: с ним пагинатор обходится без запроса COUNT(*).
+    """
+    cursor = request.GET.get('cursor')
+    if cursor is None and is_small(items, count):
+        paginator = Paginator(items, NUMBER_OF_POSTS)
+        if count is not None:
+            paginator.count = count
+        page_number = request.GET.get('page')
+        page_obj = paginator.get_page(page_number)
+        return page_obj
+    paginator = CursorPaginator(items, NUMBER_OF_POSTS)
+    return paginator.get_page(cursor)
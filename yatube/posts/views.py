@@ -1,104 +1,251 @@
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, get_object_or_404, redirect
 
-from .forms import PostForm, CommentForm
-from .models import Post, Group, User
-from .utils import paginate
+from core.db.replicas import pins_primary, replica_reads
+
+from . import counters
+from .cache import (
+    add_page_tags, cache_for_guests, card_tags, comment_tags,
+    conditional_page, feed_cache_key, recorded_page_tags,
+)
+from .forms import CommentForm, PostForm, PostImageForm
+from .models import Comment, Post, Group, User
+from .search import search_posts
+from .uploads import enqueue_optimization, upload_exceeds_limit
+from .utils import CursorPaginator, paginate
 
 NUMBER_OF_POSTS = 10
+COMMENTS_PER_PAGE = 20
+FEED_CACHE_TIMEOUT = 5 * 60
+
+
+def index_tags():
+    return ['posts']
+
+
+def group_tags(slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'pk', flat=True
+    ).first()
+    return group_id and [f'group:{group_id}']
+
+
+def profile_tags(username):
+    author_id = User.objects.filter(username=username).values_list(
+        'pk', flat=True
+    ).first()
+    return author_id and [f'author:{author_id}']
+
+
+def post_tags(post_id):
+    post = Post.objects.filter(pk=post_id).values_list(
+        'author_id', 'group_id'
+    ).first()
+    if post is None:
+        return None
+    author_id, group_id = post
+    tags = [*comment_tags(post_id), f'author:{author_id}']
+    if group_id is not None:
+        tags.append(f'group:{group_id}')
+    return tags
 
 
+def feed_tags(request, page_obj):
+    """
+    Теги карточек для ключа фрагмента ленты. Если они известны по
+    прошлому рендерингу, посты страницы здесь не читаются: при попадании
+    в кеш фрагмента запроса за ними не будет, а при промахе теги найдёт
+    {% add_card_tags %} в шаблоне.
+    """
+    tags = recorded_page_tags(request)
+    if tags is None:
+        tags = add_page_tags(request, *card_tags(page_obj))
+    return tags
+
+
+@replica_reads
+@cache_for_guests(index_tags)
+@conditional_page(index_tags)
 def index(request):
     post_list = Post.objects.select_related('group', 'author')
-    page_obj = paginate(request, post_list, NUMBER_OF_POSTS)
+    page_obj = paginate(
+        request, post_list, NUMBER_OF_POSTS, counters.post_count()
+    )
     context = {
         'page_obj': page_obj,
+        'feed_key': feed_cache_key(
+            request, 'posts', *feed_tags(request, page_obj)
+        ),
+        'cache_timeout': FEED_CACHE_TIMEOUT,
     }
     return render(request, 'posts/index.html', context)
 
 
+@replica_reads
+@cache_for_guests(group_tags)
+@conditional_page(group_tags)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.select_related('group')
-    page_obj = paginate(request, post_list, NUMBER_OF_POSTS)
+    post_list = group.posts.select_related('author', 'group')
+    page_obj = paginate(
+        request,
+        post_list,
+        NUMBER_OF_POSTS,
+        counters.group_post_count(group.pk)
+    )
     context = {
         'group': group,
         'page_obj': page_obj,
         'is_group_list': True,
+        'feed_key': feed_cache_key(
+            request,
+            f'group:{group.pk}',
+            *feed_tags(request, page_obj),
+        ),
+        'cache_timeout': FEED_CACHE_TIMEOUT,
     }
     return render(request, 'posts/group_list.html', context)
 
 
+@replica_reads
+@cache_for_guests(profile_tags)
+@conditional_page(profile_tags)
 def profile(request, username):
     author = get_object_or_404(User, username=username)
-    author_post = author.posts.select_related('author')
-    page_obj = paginate(request, author_post, NUMBER_OF_POSTS)
-    num_of_posts = author_post.count()
+    author_post = author.posts.select_related('author', 'group')
+    num_of_posts = counters.author_post_count(author.pk)
+    page_obj = paginate(request, author_post, NUMBER_OF_POSTS, num_of_posts)
     context = {
         'author': author,
         'page_obj': page_obj,
         'num_of_posts': num_of_posts,
         'is_profile': True,
+        'feed_key': feed_cache_key(
+            request,
+            f'author:{author.pk}',
+            *feed_tags(request, page_obj),
+        ),
+        'cache_timeout': FEED_CACHE_TIMEOUT,
     }
     return render(request, 'posts/profile.html', context)
 
 
+def search(request):
+    query = request.GET.get('q', '').strip()
+    post_list = search_posts(
+        Post.objects.select_related('group', 'author'), query
+    )
+    page_obj = paginate(request, post_list, NUMBER_OF_POSTS)
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/search.html', context)
+
+
+def comments_page(request, post_id):
+    """Порция комментариев от старых к новым, курсор по (created, id)."""
+    paginator = CursorPaginator(
+        Comment.objects.filter(post_id=post_id).select_related('author'),
+        COMMENTS_PER_PAGE,
+        ordering=('created', 'id'),
+        descending=False,
+    )
+    return paginator.get_page(request.GET.get('cursor'))
+
+
+@replica_reads
+@cache_for_guests(post_tags)
+@conditional_page(post_tags)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
-    num_of_posts = post.author.posts.count()
+    post = get_object_or_404(
+        Post.objects.select_related('author', 'group'), id=post_id
+    )
+    num_of_posts = counters.author_post_count(post.author_id)
     form = CommentForm(request.POST or None)
-    comments = post.comments.select_related('post')
     context = {
         'post': post,
         'num_of_posts': num_of_posts,
         'form': form,
-        'comments': comments
+        'comments': comments_page(request, post.id),
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+@conditional_page(post_tags)
+def post_comments(request, post_id):
+    get_object_or_404(Post.objects.only('id'), id=post_id)
+    context = {
+        'post_id': post_id,
+        'comments': comments_page(request, post_id),
+        'is_fragment': True,
+    }
+    return render(request, 'includes/comments.html', context)
+
+
 @login_required
+@pins_primary
 def post_create(request):
-    form = PostForm(request.POST or None, files=request.FILES or None)
+    form = PostForm(request.POST or None)
+    image_form = PostImageForm(
+        request.POST or None,
+        files=request.FILES or None,
+        upload_exceeds_limit=upload_exceeds_limit(request),
+    )
 
-    if not form.is_valid() or request.method != "POST":
+    if (not form.is_valid() or not image_form.is_valid()
+            or request.method != "POST"):
         context = {
             'form': form,
+            'image_form': image_form,
         }
         return render(request, 'posts/create_post.html', context)
 
     post = form.save(commit=False)
     post.author = request.user
+    new_image = image_form.apply(post)
     post.save()
+    if new_image:
+        enqueue_optimization(post)
     return redirect('posts:profile', request.user.username)
 
 
 @login_required
+@pins_primary
 def post_edit(request, post_id):
     post = get_object_or_404(Post, id=post_id)
 
-    if post.author != request.user:
+    if post.author_id != request.user.pk:
         return redirect('posts:profile', request.user.username)
 
-    form = PostForm(
+    form = PostForm(request.POST or None, instance=post)
+    image_form = PostImageForm(
         request.POST or None,
         files=request.FILES or None,
-        instance=post
+        initial={'image': post.image},
+        upload_exceeds_limit=upload_exceeds_limit(request),
     )
 
-    if not form.is_valid() or request.method != "POST":
+    if (not form.is_valid() or not image_form.is_valid()
+            or request.method != "POST"):
         context = {
             'post': post,
             'form': form,
+            'image_form': image_form,
             'is_edit': True,
         }
         return render(request, 'posts/create_post.html', context)
 
-    form.save()
+    post = form.save(commit=False)
+    new_image = image_form.apply(post)
+    post.save()
+    if new_image:
+        enqueue_optimization(post)
     return redirect('posts:post_detail', str(post_id))
 
 
 @login_required()
+@pins_primary
 def add_comment(request, post_id):
     form = CommentForm(request.POST or None)
     post = get_object_or_404(Post, id=post_id)
@@ -26,6 +26,7 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'posts.apps.PostsConfig',
     'about.apps.AboutConfig',
+    'api.apps.ApiConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -36,7 +37,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.ServerTimingMiddleware',
+    'core.middleware.QueryDetectorMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'posts.middleware.GuestPageCacheMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -51,10 +55,18 @@ STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.metrics.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Скомпилированные шаблоны кешируются и при DEBUG (тогда
+            # изменённые файлы перечитываются), {% include %} с именем-
+            # константой встраивается в шаблон при компиляции.
+            'loaders': [
+                ('core.template_loaders.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -68,16 +80,59 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
+TEST_RUNNER = 'core.test_runner.Runner'
+
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
+# 'tuned' — SQLite в режиме WAL с PRAGMA для нагрузки и постоянными
+# соединениями (core.db.sqlite3); 'plain' — стандартный бэкенд Django,
+# для сравнения: YATUBE_DB=plain python manage.py bench_views ...
+DATABASE_ENGINES = {
+    'plain': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
+    },
+    'tuned': {
+        'ENGINE': 'core.db.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': 600,
+        'OPTIONS': {
+            'pragmas': {
+                'journal_mode': 'wal',
+                'synchronous': 'normal',
+                'mmap_size': 256 * 2 ** 20,
+                'cache_size': -64 * 1024,
+                'busy_timeout': 5000,
+            },
+            'transaction_mode': 'IMMEDIATE',
+            'health_checks': True,
+        },
+    },
+}
+
+DATABASES = {
+    'default': DATABASE_ENGINES[os.environ.get('YATUBE_DB', 'tuned')],
 }
 
+# Реплики для чтения лент (core.db.replicas): YATUBE_REPLICAS — пути
+# к копиям базы через запятую. После записи чтения пользователя
+# REPLICA_PIN_SECONDS секунд идут в основную базу.
+for number, replica in enumerate(
+    filter(None, os.environ.get('YATUBE_REPLICAS', '').split(','))
+):
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        'NAME': replica,
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+
+DATABASE_ROUTERS = ['core.db.replicas.ReplicaRouter']
+
+REPLICA_PIN_SECONDS = 5
+
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
 
@@ -112,14 +167,75 @@ USE_TZ = True
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/2.2/howto/static-files/
 
+# LocMemCache у каждого процесса свой; при нескольких воркерах
+# включите общий кеш в файле SQLite: YATUBE_CACHE=sqlite.
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'core.cache.LocMemCache',
+    },
+    'sqlite': {
+        'BACKEND': 'core.cache.SQLiteCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache.sqlite3'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+            'MAX_SIZE': 256 * 2 ** 20,
+        },
+    },
+}
+
 CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    'default': CACHE_BACKENDS[os.environ.get('YATUBE_CACHE', 'locmem')],
 }
 
+# Общий кеш страниц для гостей (posts.middleware.GuestPageCacheMiddleware).
+# Копия устаревает по версиям тегов, таймаут только подчищает кеш.
+GUEST_PAGE_CACHE_TIMEOUT = 10 * 60
+
+# Адреса, которые проходят мимо ServerTimingMiddleware,
+# QueryDetectorMiddleware и GuestPageCacheMiddleware: у JSON API нет
+# шаблонов, а условный GET он отрабатывает сам.
+BARE_PATH_PREFIXES = ('/api/',)
+
 STATIC_URL = '/static/'
 
+# Метрики запроса (core.middleware.ServerTimingMiddleware): в лог попадает
+# эта доля запросов и все запросы медленнее порога. Тесты выключают
+# выборку сами (core.test_runner, core.pytest_plugin).
+PERFORMANCE_LOG_SAMPLE_RATE = float(
+    os.environ.get('YATUBE_PERFORMANCE_SAMPLE_RATE', 0.01)
+)
+
+PERFORMANCE_SLOW_REQUEST_MS = 500
+
+# Поиск N+1 и медленных SQL (core.middleware.QueryDetectorMiddleware).
+QUERY_DETECTOR = False
+
+QUERY_DETECTOR_SLOW_MS = 100
+
+QUERY_DETECTOR_DUPLICATES = 3
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'yatube.performance': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+        'yatube.queries': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+        },
+    },
+}
+
+# До этого числа записей лента листается по номерам страниц,
+# дальше включается курсорная пагинация без COUNT(*) и OFFSET.
+PAGINATION_CURSOR_THRESHOLD = 100
+
 LOGIN_URL = 'users:login'
 
 LOGIN_REDIRECT_URL = 'posts:index'
@@ -133,3 +249,27 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 MEDIA_URL = '/media/'
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Загрузки пишутся во временный файл порциями; всё, что больше
+# POST_IMAGE_MAX_BYTES, отбрасывается, а форма поста отклоняет файл.
+FILE_UPLOAD_HANDLERS = ['posts.uploads.LimitedTemporaryFileUploadHandler']
+
+POST_IMAGE_MAX_BYTES = 10 * 1024 * 1024
+
+POST_IMAGE_MAX_PIXELS = 40 * 1000 * 1000
+
+# Превью картинок постов. Их готовит фоновый воркер
+# (python manage.py thumbnail_worker), шаблоны только берут готовый URL.
+POST_IMAGE_RENDITIONS = {
+    'card': {'geometry': '960x339', 'crop': 'center', 'upscale': True},
+}
+
+# Очередь превью (posts.thumbnails): после ошибки задача ждёт
+# RENDITION_RETRY_SECONDS, и пауза удваивается с каждой попыткой.
+RENDITION_MAX_ATTEMPTS = 5
+
+RENDITION_RETRY_SECONDS = 60
+
+# Задача, взятая воркером, вернётся в очередь, если он не успел за это
+# время, например упал.
+RENDITION_LEASE_SECONDS = 10 * 60